@@ -1,5 +1,22 @@
 import streamlit as st
 
+from utils import diagnostics
+from utils.metrics import end_page, start_page
+from utils.warmup import start_background_warmup
+
+start_page("Home")
+
+# Load datasets, search indexes and thumbnails in the background (once per process)
+start_background_warmup()
+
+# Hidden diagnostics view: /?diagnostics=<key> (not listed in the sidebar)
+if diagnostics.requested():
+    diagnostics.render_diagnostics()
+    end_page()
+    st.stop()
+
 url = "https://github.com/MK316/APP4U/raw/main/images/apps4U_logo2.png"
 
 st.image(url, caption="MK316: This app blog opened on Mar.11, 2025 (Last updated on Jul. 26, 2026)", width=600)
+
+end_page()
@@ -1,5 +1,9 @@
 import streamlit as st
 
+from utils.metrics import end_page, start_page
+
+start_page("About")
+
 # Display the application's image or logo if available
 url = "https://github.com/MK316/APP4U/raw/main/images/cat02.png"
 st.image(url, caption='App4U - Empowering English Educators', width=200)
@@ -27,5 +31,4 @@ Got ideas or requests? Your input is valued in shaping this platform to help you
 """)
 st.info(' ⬅️ Click "Message Board" menu on the left to leave your message')
 
-
-
+end_page()
@@ -1,11 +1,18 @@
 import streamlit as st
-import pandas as pd
+
+from utils.datasets import load_dataset
+from utils.gallery import Tile, render_gallery, reset_gallery
+from utils.image_variants import remote_variant
+from utils.query_lang import QuerySyntaxError
+from utils.metrics import end_page, start_page
+from utils.search import SEARCH_HELP, SEARCH_MODES, search_rows
 
 
 # ---------------------------
 # Page setup (MUST be first Streamlit call)
 # ---------------------------
 st.set_page_config(page_title="Teacher Certification Exam Search", layout="wide")
+start_page("Search: Phonology")
 st.title("TCE Search I")
 
 # Define tab navigation
@@ -13,25 +20,23 @@ tab1, tab2 = st.tabs(["🌀 TCE Search: Phonology & Morphology", "🍎 Overview"
 
 
 with tab1:
-    # Load the DataFrame
-    # url = "https://raw.githubusercontent.com/MK316/APP4U/refs/heads/main/data/TExam_new20241125.csv"
-    url = "https://raw.githubusercontent.com/MK316/APP4U/refs/heads/main/pages/data/TExam_new20251122.csv"
-    df = pd.read_csv(url, encoding='utf-8-sig')
+    # Load the DataFrame (local copy, parsed once per process)
+    dataset = load_dataset("Phonology")
+    df = dataset.df
 
     # Function to search years based on the selected mode
     def search_years(search_mode, query):
-        query = query.strip().lower()
-        if search_mode == "YEAR":
-            matches = df[df['YEAR'].str.startswith(query[:4])]
-        elif search_mode == "Keywords":
-            keyword_list = query.split(',')
-            matches = df[df['KEYWORDS'].str.lower().apply(lambda x: any(keyword in x for keyword in keyword_list))]
-        elif search_mode == "Words containing":
-            matches = df[df['TEXT'].str.lower().str.contains(query)]
-        else:
+        if search_mode not in SEARCH_MODES:
             st.error("Please select a valid search mode.")
             return []
 
+        # "Words containing" and "Fuzzy" come back ranked, best match first
+        try:
+            ranked = search_rows(dataset, search_mode, query)
+        except QuerySyntaxError as e:
+            st.error(f"Could not parse the query: {e}")
+            return []
+        matches = df.iloc[[row for row, _ in ranked]]
         if matches.empty:
             st.error("No results found for your query.")
             return []
@@ -48,34 +53,67 @@ with tab1:
             st.write("Search mode by:")  # Label
 
         with col2:
-            search_mode = st.radio("", ["YEAR", "Keywords", "Words containing"], horizontal=True)
+            search_mode = st.radio("", list(SEARCH_MODES), horizontal=True)
 
-        query = st.text_input("Search Query: e.g., 2024 (by YEAR), 'tapping' (by Keywords) or 'distribution' (Words containing)", "")
+        query = st.text_input("Search Query: e.g., 2024 (by YEAR), 'tapping' or 'tapping & flap' (by Keywords) or 'distribution' (Words containing / Fuzzy)", "", help=SEARCH_HELP)
+        st.caption('Query mode: combine year:2015..2020, kw:tapping, text:"flap", fuzzy:... with AND / OR / NOT and parentheses.')
         search_button = st.form_submit_button('🍒 Click to Search')
 
     if search_button:
         results = search_years(search_mode, query)
+        reset_gallery('gallery')
         if results:
             st.session_state['results'] = results
             st.session_state['selected_year'] = results[0]  # Default to first result
             st.success("Search completed successfully.")
 
+    def image_url_for(filename):
+        return f'https://huggingface.co/spaces/MK-316/TCE/resolve/main/TExams/{filename}'
+
+    def gallery_tiles(years):
+        first = df.drop_duplicates('YEAR').set_index('YEAR')
+        tiles = []
+        for year in years:
+            url = image_url_for(first.loc[year, 'Filename'])
+            tiles.append(Tile(
+                title=year,
+                caption=first.loc[year, 'KEYWORDS'],
+                thumb=lambda url=url: remote_variant(url, "thumb"),
+                full=lambda url=url: remote_variant(url, "screen"),
+            ))
+        return tiles
+
     # Select box to choose year from results
     st.subheader('❄️ [2] Choose an item from the selected:')
-    if 'results' in st.session_state:
-        selected_year = st.selectbox("Select a year from the results", st.session_state['results'], index=0, key='selected_year')
-
-    # Button to display exam question
-    if st.button('🍒 Show me the exam question') and 'selected_year' in st.session_state:
-        match = df[df['YEAR'] == st.session_state['selected_year']]
-        if not match.empty:
-            image_filename = match.iloc[0]['Filename']
-            image_url = f'https://huggingface.co/spaces/MK-316/TCE/resolve/main/TExams/{image_filename}'
-            keywords = match.iloc[0]['KEYWORDS']
-            st.markdown(f"**🌷 Keywords:** 🔑 {keywords}")
-            st.image(image_url, caption=f'Exam Image for {st.session_state["selected_year"]}', width=800)
-        else:
-            st.error("No keywords or image found for this year.")
+    view = st.radio("View results as", ["List", "Gallery"], horizontal=True, key='results_view')
+
+    if view == "Gallery":
+        # Thumbnails of every result at once; click one to expand
+        if st.session_state.get('results'):
+            render_gallery(gallery_tiles(list(dict.fromkeys(st.session_state['results']))), key='gallery')
+    else:
+        if 'results' in st.session_state:
+            selected_year = st.selectbox("Select a year from the results", st.session_state['results'], index=0, key='selected_year')
+
+        # Screen size is a downscaled WebP (much lighter on mobile connections)
+        image_size = st.radio("Image size", ["screen", "original"], horizontal=True, key='img_size',
+                              format_func={"screen": "📱 Screen size", "original": "🔍 Original"}.get)
+
+        # Button to display exam question
+        if st.button('🍒 Show me the exam question') and 'selected_year' in st.session_state:
+            match = df[df['YEAR'] == st.session_state['selected_year']]
+            if not match.empty:
+                image_filename = match.iloc[0]['Filename']
+                image_url = image_url_for(image_filename)
+                keywords = match.iloc[0]['KEYWORDS']
+                st.markdown(f"**🌷 Keywords:** 🔑 {keywords}")
+                try:
+                    data = remote_variant(image_url, image_size)
+                    st.image(data, caption=f'Exam Image for {st.session_state["selected_year"]}', width=800)
+                except Exception as e:
+                    st.error(f"Failed to load image.\n{image_url}\nError: {e}")
+            else:
+                st.error("No keywords or image found for this year.")
 
 
 with tab2:
@@ -90,7 +128,7 @@ with tab2:
     st.markdown("""
     #### ❄️ Here's How to Use:
     <div style="color: #FF8000;"><b>+ Step 1 Start Searching:</b></div>
-    Users can search exam questions by <b>year, keywords, or text content (words containing...)</b>. After specifying the search criteria,
+    Users can search exam questions by <b>year, keywords, or text content (words containing... or fuzzy, which tolerates typos)</b>. After specifying the search criteria,
     the application displays the relevant years where these questions appeared.
     
     <div style="color: #FF8000;"><b>+ Step 2 Choose an Item from the Selected:</b></div>
@@ -103,3 +141,5 @@ with tab2:
     <div style="color: #0066CC;">This tool supports teachers and students preparing for certification exams in phonetics and phonology,
     continually updating to enhance its functionality and user experience.</div>
     """, unsafe_allow_html=True)
+
+end_page()
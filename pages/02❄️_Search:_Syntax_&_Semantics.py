@@ -1,25 +1,30 @@
+import os
 import streamlit as st
-import pandas as pd
-import urllib.request
 from urllib.parse import quote
 from io import BytesIO
 from PIL import Image
 
+from utils.datasets import ROOT, Dataset, load_dataset
+from utils.gallery import Tile, render_gallery, reset_gallery
+from utils.image_cache import load_image_bytes
+from utils.image_manifest import filename_variants, lookup_image
+from utils.image_variants import local_variant, remote_variant
+from utils.keyword_index import parse_query
+from utils.metrics import end_page, start_page
+from utils.query_lang import QuerySyntaxError
+from utils.search import MODE_COLUMNS, SEARCH_HELP, SEARCH_MODES, search_rows
+
 # ---------------------------
 # Page setup (MUST be first Streamlit call)
 # ---------------------------
 st.set_page_config(page_title="Teacher Certification Exam Search", layout="wide")
+start_page("Search: Syntax & Semantics")
 st.title("TCE Search II")
 
 # ---------------------------
 # Config
 # ---------------------------
-DATASETS = {
-    "Syntax": "https://raw.githubusercontent.com/MK316/APP4U/main/pages/data/TExam_syntax.csv",
-    "Semantics": "https://raw.githubusercontent.com/MK316/APP4U/main/pages/data/TExam_semantics.csv",
-    "Grammar": "https://raw.githubusercontent.com/MK316/APP4U/main/pages/data/TExam_grammar.csv",
-}
-
+# Datasets are resolved by name in utils/datasets.py (local copy first)
 IMAGE_BASE_URLS = {
     "Syntax": "https://raw.githubusercontent.com/MK316/APP4U/main/data/syntax/",
     "Semantics": "https://raw.githubusercontent.com/MK316/APP4U/main/data/semantics/",
@@ -27,98 +32,57 @@ IMAGE_BASE_URLS = {
 }
 
 # ---------------------------
-# Network helpers
+# Image helpers
 # ---------------------------
-@st.cache_data(show_spinner=False, ttl=3600)
-def fetch_bytes(url: str) -> bytes:
-    req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
-    with urllib.request.urlopen(req) as resp:
-        return resp.read()
-
-@st.cache_data(show_spinner=False, ttl=3600)
-def load_csv(url: str) -> pd.DataFrame:
-    raw = fetch_bytes(url)
-    df = pd.read_csv(BytesIO(raw), encoding="utf-8-sig")
-    for col in ["YEAR", "KEYWORDS", "TEXT", "Filename"]:
-        if col in df.columns:
-            df[col] = df[col].astype(str).fillna("")
-    return df
-
-@st.cache_data(show_spinner=False, ttl=3600)
-def load_pil_image(url: str) -> Image.Image:
-    b = fetch_bytes(url)
-    return Image.open(BytesIO(b)).convert("RGB")
+IMAGE_SIZES = {"screen": "📱 Screen size", "original": "🔍 Original"}
+
+def fetch_image(url: str, entry: dict | None = None, size: str = "original") -> bytes:
+    # Manifest entries are content-addressed and usually shipped in the repo
+    entry = entry or {}
+    local_path = os.path.join(ROOT, entry["path"]) if entry.get("path") else None
+    if local_path and os.path.isfile(local_path):
+        return local_variant(local_path, entry["sha1"], size)
+    if size == "original":
+        return load_image_bytes(url, sha1=entry.get("sha1"))
+    return remote_variant(url, size)
+
+def image_size(data: bytes) -> tuple[int, int]:
+    # Reads the header only; the bitmap is never decoded on the server
+    with Image.open(BytesIO(data)) as im:
+        return im.size
 
 # ---------------------------
 # Filename helpers
 # ---------------------------
-def strip_path(filename: str) -> str:
-    fn = (filename or "").strip().replace("\\", "/")
-    return fn.split("/")[-1]
-
-def filename_variants(filename: str) -> list[str]:
-    fn0 = strip_path(filename)
-    if not fn0:
-        return []
-
-    variants = [fn0]
-    if " " in fn0:
-        variants.append(fn0.replace(" ", "_"))
-
-    out = []
-    for v in variants:
-        lower = v.lower()
-        if lower.endswith(".png"):
-            stem = v[:-4]
-            out.extend([stem + ".png", stem + ".PNG"])
-        elif lower.endswith(".jpg"):
-            stem = v[:-4]
-            out.extend([stem + ".jpg", stem + ".JPG"])
-        elif lower.endswith(".jpeg"):
-            stem = v[:-5]
-            out.extend([stem + ".jpeg", stem + ".JPEG"])
-        else:
-            out.extend([v + ".png", v + ".PNG"])
-
-    out.extend(variants)
-
-    seen, uniq = set(), []
-    for x in out:
-        x = x.strip()
-        if x and x not in seen:
-            seen.add(x)
-            uniq.append(x)
-
-    return uniq
-
 def candidate_urls(base_url: str, filename: str) -> list[str]:
     return [f"{base_url}{quote(fn)}" for fn in filename_variants(filename)]
 
 # ---------------------------
 # Search helpers
 # ---------------------------
-def search_years(df: pd.DataFrame, search_mode: str, query: str) -> list[str]:
-    query = (query or "").strip().lower()
+def search_years(dataset: Dataset, search_mode: str, query: str) -> list[str]:
+    df = dataset.df
+    query = (query or "").strip()  # search_rows lowercases; "Query" needs its uppercase operators
     if not query:
         st.error("Type a search query first.")
         return []
 
-    needed = {"YEAR": "YEAR", "Keywords": "KEYWORDS", "Words containing": "TEXT"}
-    col = needed.get(search_mode)
+    col = MODE_COLUMNS.get(search_mode)
     if col and col not in df.columns:
         st.error(f"Your dataset is missing the required column: {col}")
         return []
 
-    if search_mode == "YEAR":
-        matches = df[df["YEAR"].str.startswith(query[:4])]
-    elif search_mode == "Keywords":
-        keys = [k.strip() for k in query.split(",") if k.strip()]
-        if not keys:
-            st.error("Enter at least one keyword (comma-separated).")
-            return []
-        matches = df[df["KEYWORDS"].str.lower().apply(lambda x: any(k in x for k in keys))]
-    else:
-        matches = df[df["TEXT"].str.lower().str.contains(query, na=False)]
+    if search_mode == "Keywords" and not parse_query(query):
+        st.error("Enter at least one keyword (comma-separated).")
+        return []
+
+    # "Words containing" (BM25) and "Fuzzy" come back ranked, best match first
+    try:
+        ranked = search_rows(dataset, search_mode, query)
+    except QuerySyntaxError as e:
+        st.error(f"Could not parse the query: {e}")
+        return []
+    matches = df.iloc[[row for row, _ in ranked]]
 
     if matches.empty:
         st.error("No results found.")
@@ -137,6 +101,7 @@ def search_years(df: pd.DataFrame, search_mode: str, query: str) -> list[str]:
 # ---------------------------
 def render_image_view(tab_key: str):
     img_url = st.session_state.get(f"{tab_key}_img_url", "")
+    img_entry = st.session_state.get(f"{tab_key}_img_entry") or {}
     year = st.session_state.get(f"{tab_key}_img_year", "")
     tab_name = st.session_state.get(f"{tab_key}_img_tabname", tab_key)
     keywords = st.session_state.get(f"{tab_key}_img_keywords", "")
@@ -150,24 +115,53 @@ def render_image_view(tab_key: str):
     with st.expander("Image URL (debug)", expanded=False):
         st.write(img_url)
 
+    size = st.radio(
+        "Image size",
+        list(IMAGE_SIZES),
+        format_func=IMAGE_SIZES.get,
+        horizontal=True,
+        key=f"{tab_key}_img_size",
+    )
+
     try:
-        img = load_pil_image(img_url)
-        st.caption(f"Original pixels: {img.size[0]} × {img.size[1]}")
+        data = fetch_image(img_url, img_entry, size)
+        width, height = (img_entry["width"], img_entry["height"]) if img_entry else image_size(data)
+        st.caption(f"Original pixels: {width} × {height} · sent {len(data) / 1024:.0f} KB")
         # Native display (best for sharp text)
-        st.image(img, caption=f"{tab_name} Exam Image for {year}")
+        st.image(data, caption=f"{tab_name} Exam Image for {year}")
     except Exception as e:
         st.error(f"Failed to load image.\n{img_url}\nError: {e}")
 
+# ---------------------------
+# Gallery
+# ---------------------------
+def gallery_tiles(tab_name: str, df, years: list[str]) -> list[Tile]:
+    base = IMAGE_BASE_URLS[tab_name]
+    first = df.drop_duplicates("YEAR").set_index("YEAR")
+    tiles = []
+    for year in years:
+        row = first.loc[year]
+        entry = lookup_image(tab_name, row.get("Filename", ""))
+        if entry:
+            url = f"{base}{quote(entry['path'].rsplit('/', 1)[-1])}"
+            thumb = lambda url=url, entry=entry: fetch_image(url, entry, "thumb")
+            full = lambda url=url, entry=entry: fetch_image(url, entry, "screen")
+        else:
+            thumb = full = None
+        tiles.append(Tile(title=year, caption=row.get("KEYWORDS", ""), thumb=thumb, full=full))
+    return tiles
+
 # ---------------------------
 # Tab renderer
 # ---------------------------
-def render_search_tab(tab_name: str, data_url: str):
+def render_search_tab(tab_name: str):
     tab_key = tab_name.lower()
 
     try:
-        df = load_csv(data_url)
+        dataset = load_dataset(tab_name)
+        df = dataset.df
     except Exception as e:
-        st.error(f"Failed to load dataset:\n{data_url}\n\n{e}")
+        st.error(f"Failed to load dataset: {tab_name}\n\n{e}")
         return
 
     st.subheader(tab_name)
@@ -179,16 +173,18 @@ def render_search_tab(tab_name: str, data_url: str):
         with col2:
             search_mode = st.radio(
                 "",
-                ["YEAR", "Keywords", "Words containing"],
+                list(SEARCH_MODES),
                 horizontal=True,
                 key=f"{tab_key}_mode",
             )
-        query = st.text_input("[2] 📌 Search query (by YEAR or Keywords): e.g., 2026, 2014, ... or wh-movement, intransitive, tense, etc.", "", key=f"{tab_key}_query")
+        query = st.text_input("[2] 📌 Search query (by YEAR or Keywords): e.g., 2026, 2014, ... or wh-movement, intransitive, tense, etc. (use & to require several keywords)", "", key=f"{tab_key}_query", help=SEARCH_HELP)
+        st.caption('Query mode: combine year:2015..2020, kw:tense, text:"raising", fuzzy:... with AND / OR / NOT and parentheses.')
         submitted = st.form_submit_button("🍒 Search")
 
     if submitted:
-        results = search_years(df, search_mode, query)
+        results = search_years(dataset, search_mode, query)
         st.session_state[f"{tab_key}_results"] = results
+        reset_gallery(f"{tab_key}_gallery")
         if results:
             st.session_state[f"{tab_key}_year"] = results[0]
 
@@ -197,6 +193,11 @@ def render_search_tab(tab_name: str, data_url: str):
         st.info("Run a search to see results.")
         return
 
+    view = st.radio("View results as", ["List", "Gallery"], horizontal=True, key=f"{tab_key}_view")
+    if view == "Gallery":
+        render_gallery(gallery_tiles(tab_name, df, results), key=f"{tab_key}_gallery")
+        return
+
     selected_year = st.selectbox(
         "Select a year from results",
         results,
@@ -218,17 +219,22 @@ def render_search_tab(tab_name: str, data_url: str):
             return
 
         base = IMAGE_BASE_URLS[tab_name]
-        urls = candidate_urls(base, filename)
 
+        # Resolved offline by utils/image_manifest.py: no probe, the view fetches it
+        entry = lookup_image(tab_name, filename)
         chosen = None
         last_err = None
-        for u in urls:
-            try:
-                _ = load_pil_image(u)
-                chosen = u
-                break
-            except Exception as e:
-                last_err = e
+        if entry:
+            chosen = f"{base}{quote(entry['path'].rsplit('/', 1)[-1])}"
+        else:
+            # Not in the manifest yet (new CSV row): probe spellings
+            for u in candidate_urls(base, filename):
+                try:
+                    _ = fetch_image(u)
+                    chosen = u
+                    break
+                except Exception as e:
+                    last_err = e
 
         if not chosen:
             st.error(
@@ -241,6 +247,7 @@ def render_search_tab(tab_name: str, data_url: str):
 
         # Persist selection so reruns keep showing the image
         st.session_state[f"{tab_key}_img_url"] = chosen
+        st.session_state[f"{tab_key}_img_entry"] = entry
         st.session_state[f"{tab_key}_img_year"] = selected_year
         st.session_state[f"{tab_key}_img_tabname"] = tab_name
         st.session_state[f"{tab_key}_img_keywords"] = keywords
@@ -254,10 +261,12 @@ def render_search_tab(tab_name: str, data_url: str):
 tab_syntax, tab_prag, tab_gram = st.tabs(["🚦 Syntax", "🚦 Semantics & Pragmatics", "🚦 Grammar"])
 
 with tab_syntax:
-    render_search_tab("Syntax", DATASETS["Syntax"])
+    render_search_tab("Syntax")
 
 with tab_prag:
-    render_search_tab("Semantics", DATASETS["Semantics"])
+    render_search_tab("Semantics")
 
 with tab_gram:
-    render_search_tab("Grammar", DATASETS["Grammar"])
+    render_search_tab("Grammar")
+
+end_page()
@@ -0,0 +1,93 @@
+import streamlit as st
+import pandas as pd
+
+from utils.query_cache import normalize_query
+from utils.query_lang import QuerySyntaxError, parse_query
+from utils.metrics import end_page, start_page
+from utils.search import SEARCH_HELP, SEARCH_MODES, SUBJECTS, iter_search_all, merge_hits
+
+# ---------------------------
+# Page setup (MUST be first Streamlit call)
+# ---------------------------
+st.set_page_config(page_title="Teacher Certification Exam Search", layout="wide")
+start_page("Search: All Subjects")
+st.title("TCE Search: Everything")
+st.caption("Searches Phonology, Syntax, Semantics and Grammar at once. Results appear as each subject finishes.")
+
+# ---------------------------
+# Helpers
+# ---------------------------
+def hits_table(hits) -> pd.DataFrame:
+    return pd.DataFrame(
+        [{"Subject": h.subject, "YEAR": h.year, "KEYWORDS": h.keywords, "Score": round(h.score, 4)} for h in hits],
+        columns=["Subject", "YEAR", "KEYWORDS", "Score"],
+    )
+
+
+def query_error(mode: str, query: str) -> str | None:
+    # Parse "Query" mode up front so a typo is reported once, not per subject
+    if mode != "Query":
+        return None
+    try:
+        parse_query(normalize_query(query, lower=False))
+    except QuerySyntaxError as e:
+        return str(e)
+    return None
+
+# ---------------------------
+# UI
+# ---------------------------
+with st.form(key="all_form"):
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        st.write("[1] 📌 Search mode:")
+    with col2:
+        search_mode = st.radio("", list(SEARCH_MODES), horizontal=True, key="all_mode")
+    query = st.text_input("[2] 📌 Search query: e.g., 2024, tapping, wh-movement, implicature ...", "", key="all_query", help=SEARCH_HELP)
+    st.caption('Query mode: combine year:2015..2020, kw:tapping, text:"flap", fuzzy:... with AND / OR / NOT and parentheses.')
+    submitted = st.form_submit_button("🍒 Search everything")
+
+if submitted:
+    if not query.strip():
+        st.error("Type a search query first.")
+    elif (err := query_error(search_mode, query)) is not None:
+        st.error(f"Could not parse the query: {err}")
+    else:
+        # One placeholder per subject, filled in as each search completes
+        status = st.empty()
+        cols = st.columns(len(SUBJECTS))
+        slots = {}
+        for col, subject in zip(cols, SUBJECTS):
+            with col:
+                st.markdown(f"**🚦 {subject}**")
+                slots[subject] = st.empty()
+                slots[subject].caption("Searching...")
+
+        groups = []
+        for done, (subject, hits, err) in enumerate(iter_search_all(search_mode, query), start=1):
+            status.caption(f"{done} / {len(SUBJECTS)} subjects searched")
+            if err is not None:
+                slots[subject].error(f"Search failed: {err}")
+                continue
+            groups.append(hits)
+            if hits:
+                slots[subject].write(", ".join(h.year for h in hits))
+            else:
+                slots[subject].caption("No results.")
+
+        merged = merge_hits(groups)
+        st.session_state["all_results"] = merged
+        st.session_state["all_results_for"] = (search_mode, query)
+
+merged = st.session_state.get("all_results")
+if merged is not None:
+    mode, q = st.session_state["all_results_for"]
+    st.subheader(f"🍎 Ranked results for '{q}' ({mode})")
+    if merged:
+        st.dataframe(hits_table(merged), width="stretch", hide_index=True)
+        st.caption("Subjects are interleaved by their own ranking: each subject's best match first, then each "
+                   "second best, and so on. Open the subject's search page to view an exam question image.")
+    else:
+        st.error("No results found.")
+
+end_page()
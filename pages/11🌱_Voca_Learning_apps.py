@@ -1,3 +1,9 @@
 import streamlit as st
 
+from utils.metrics import end_page, start_page
+
+start_page("Voca Learning apps")
+
 st.markdown("1. [md33](https://md33.lovable.app/): md33 dictionary for your practice")
+
+end_page()
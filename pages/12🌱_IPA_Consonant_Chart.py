@@ -1,7 +1,10 @@
 
 import streamlit as st
 
+from utils.metrics import end_page, start_page
+
 st.set_page_config(page_title="Final IPA Vowel Chart")
+start_page("IPA Consonant Chart")
 
 st.title("🌱 IPA English Consonant Chart")
 
@@ -20,3 +23,5 @@ with tab2:
 
 with tab3:
     st.markdown("📌 To be updated.")
+
+end_page()
@@ -4,7 +4,10 @@ from PIL import Image
 from io import BytesIO
 import requests
 
+from utils.metrics import count, end_page, start_page, timed
+
 st.set_page_config(page_title="Final IPA Vowel Chart", layout="wide")
+start_page("IPA Vowel Chart")
 
 
 st.title("🌱 IPA Vowel Chart")
@@ -171,9 +174,13 @@ with tab3:
     image_url = "https://github.com/MK316/APP4U/raw/main/images/diphthongs.png"
 
     try:
-        response = requests.get(image_url)
+        with timed("vowel chart fetch"):
+            response = requests.get(image_url)
         response.raise_for_status()
+        count("bytes fetched: vowel chart", len(response.content))
         image = Image.open(BytesIO(response.content))
         st.image(image, caption="Vowel chart to draw diphthongs", use_container_width=True)
     except Exception as e:
         st.error(f"❌ Failed to load the image: {e}")
+
+end_page()
@@ -1,63 +1,74 @@
+import time
+
 import streamlit as st
-import pandas as pd
-
-# ----- Feature Dictionary -----
-ipa_features = {
-    'p': {'syllabic': '-', 'consonantal': '+', 'sonorant': '-', 'coronal': '-', 'anterior': '+', 'continuant': '-', 'nasal': '-', 'strident': '-', 'lateral': '-', 'delayed release': '-', 'voice': '-'},
-    'b': {'syllabic': '-', 'consonantal': '+', 'sonorant': '-', 'coronal': '-', 'anterior': '+', 'continuant': '-', 'nasal': '-', 'strident': '-', 'lateral': '-', 'delayed release': '-', 'voice': '+'},
-    't': {'syllabic': '-', 'consonantal': '+', 'sonorant': '-', 'coronal': '+', 'anterior': '+', 'continuant': '-', 'nasal': '-', 'strident': '-', 'lateral': '-', 'delayed release': '-', 'voice': '-'},
-    'd': {'syllabic': '-', 'consonantal': '+', 'sonorant': '-', 'coronal': '+', 'anterior': '+', 'continuant': '-', 'nasal': '-', 'strident': '-', 'lateral': '-', 'delayed release': '-', 'voice': '+'},
-    'k': {'syllabic': '-', 'consonantal': '+', 'sonorant': '-', 'coronal': '-', 'anterior': '-', 'continuant': '-', 'nasal': '-', 'strident': '-', 'lateral': '-', 'delayed release': '-', 'voice': '-'},
-    'g': {'syllabic': '-', 'consonantal': '+', 'sonorant': '-', 'coronal': '-', 'anterior': '-', 'continuant': '-', 'nasal': '-', 'strident': '-', 'lateral': '-', 'delayed release': '-', 'voice': '+'},
-    'tʃ': {'syllabic': '-', 'consonantal': '+', 'sonorant': '-', 'coronal': '+', 'anterior': '-', 'continuant': '-', 'nasal': '-', 'strident': '+', 'lateral': '-', 'delayed release': '+', 'voice': '-'},
-    'dʒ': {'syllabic': '-', 'consonantal': '+', 'sonorant': '-', 'coronal': '+', 'anterior': '-', 'continuant': '-', 'nasal': '-', 'strident': '+', 'lateral': '-', 'delayed release': '+', 'voice': '+'},
-    'f': {'syllabic': '-', 'consonantal': '+', 'sonorant': '-', 'coronal': '-', 'anterior': '+', 'continuant': '+', 'nasal': '-', 'strident': '+', 'lateral': '-', 'delayed release': '-', 'voice': '-'},
-    'v': {'syllabic': '-', 'consonantal': '+', 'sonorant': '-', 'coronal': '-', 'anterior': '+', 'continuant': '+', 'nasal': '-', 'strident': '+', 'lateral': '-', 'delayed release': '-', 'voice': '+'},
-    'θ': {'syllabic': '-', 'consonantal': '+', 'sonorant': '-', 'coronal': '+', 'anterior': '+', 'continuant': '+', 'nasal': '-', 'strident': '-', 'lateral': '-', 'delayed release': '-', 'voice': '-'},
-    'ð': {'syllabic': '-', 'consonantal': '+', 'sonorant': '-', 'coronal': '+', 'anterior': '+', 'continuant': '+', 'nasal': '-', 'strident': '-', 'lateral': '-', 'delayed release': '-', 'voice': '+'},
-    's': {'syllabic': '-', 'consonantal': '+', 'sonorant': '-', 'coronal': '+', 'anterior': '+', 'continuant': '+', 'nasal': '-', 'strident': '+', 'lateral': '-', 'delayed release': '-', 'voice': '-'},
-    'z': {'syllabic': '-', 'consonantal': '+', 'sonorant': '-', 'coronal': '+', 'anterior': '+', 'continuant': '+', 'nasal': '-', 'strident': '+', 'lateral': '-', 'delayed release': '-', 'voice': '+'},
-    'ʃ': {'syllabic': '-', 'consonantal': '+', 'sonorant': '-', 'coronal': '+', 'anterior': '-', 'continuant': '+', 'nasal': '-', 'strident': '+', 'lateral': '-', 'delayed release': '-', 'voice': '-'},
-    'ʒ': {'syllabic': '-', 'consonantal': '+', 'sonorant': '-', 'coronal': '+', 'anterior': '-', 'continuant': '+', 'nasal': '-', 'strident': '+', 'lateral': '-', 'delayed release': '-', 'voice': '+'},
-    'h': {'syllabic': '-', 'consonantal': '+', 'sonorant': '-', 'coronal': '-', 'anterior': '-', 'continuant': '+', 'nasal': '-', 'strident': '-', 'lateral': '-', 'delayed release': '-', 'voice': '-'},
-    'm': {'syllabic': '-', 'consonantal': '+', 'sonorant': '+', 'coronal': '-', 'anterior': '+', 'continuant': '-', 'nasal': '+', 'strident': '-', 'lateral': '-', 'delayed release': '-', 'voice': '+'},
-    'n': {'syllabic': '-', 'consonantal': '+', 'sonorant': '+', 'coronal': '+', 'anterior': '+', 'continuant': '-', 'nasal': '+', 'strident': '-', 'lateral': '-', 'delayed release': '-', 'voice': '+'},
-    'ŋ': {'syllabic': '-', 'consonantal': '+', 'sonorant': '+', 'coronal': '-', 'anterior': '-', 'continuant': '-', 'nasal': '+', 'strident': '-', 'lateral': '-', 'delayed release': '-', 'voice': '+'},
-    'l': {'syllabic': '-', 'consonantal': '+', 'sonorant': '+', 'coronal': '+', 'anterior': '+', 'continuant': '+', 'nasal': '-', 'strident': '-', 'lateral': '+', 'delayed release': '-', 'voice': '+'},
-    'r': {'syllabic': '-', 'consonantal': '+', 'sonorant': '+', 'coronal': '+', 'anterior': '+', 'continuant': '+', 'nasal': '-', 'strident': '-', 'lateral': '-', 'delayed release': '-', 'voice': '+'},
-    'j': {'syllabic': '-', 'consonantal': '-', 'sonorant': '+', 'coronal': '+', 'anterior': '-', 'continuant': '+', 'nasal': '-', 'strident': '-', 'lateral': '-', 'delayed release': '-', 'voice': '+'},
-    'w': {'syllabic': '-', 'consonantal': '-', 'sonorant': '+', 'coronal': '-', 'anterior': '-', 'continuant': '+', 'nasal': '-', 'strident': '-', 'lateral': '-', 'delayed release': '-', 'voice': '+'}
-}
-
-# --- Convert to DataFrame ---
-df = pd.DataFrame(ipa_features)
-df = df.reindex([
-    'syllabic', 'consonantal', 'sonorant', 'coronal', 'anterior',
-    'continuant', 'nasal', 'strident', 'lateral', 'delayed release', 'voice'
-])
-
-# --- UI Selectors ---
+
+from utils.feature_matrix import feature_matrix, styled_matrix
+from utils.metrics import end_page, start_page, timed
+from utils.natural_class import get_natural_class_index
+
+start_page("Consonant Feature Matrix")
+
+# Built once per process (see utils/feature_matrix.py)
+df = feature_matrix()
+
 st.markdown("#### 🌱 Interactive Consonant Feature Matrix")
-st.caption("If none is selected for both, no additional highlights appear.")
-selected_row = st.selectbox("Highlight Feature (row)", [""] + list(df.index))
-selected_col = st.selectbox("Highlight Consonant (column)", [""] + list(df.columns))
-
-st.info("📌 'Strident' vs. 'Sibilant': Regarding the [strident] feature: /f, v/ are technically classified as [+strident]. However, in English, /f, v/ do not pattern like the other [+strident] consonants. For this reason, the term 'sibilants' is used as a cover term for the six [+strident, +coronal] sounds.")
-st.info("📌 Note also that 'stridents' and 'sibilants', in English linguistics, can be used interchangeably in the exam, referring to the 6 sounds /s, z, ʃ, ʒ, tʃ, dʒ/.")
-# --- Styling Function ---
-def style_matrix(val, row, col):
-    if val == "+":
-        return "background-color: yellow; color: black"
-    elif row == selected_row or col == selected_col:
-        return "background-color: lightblue"
-    return ""
-
-def apply_highlighting(dataframe):
-    return dataframe.style.apply(
-        lambda r: [style_matrix(v, r.name, r.index[i]) for i, v in enumerate(r)],
-        axis=1
-    )
-
-# --- Display Matrix ---
-styled_df = apply_highlighting(df)
-st.dataframe(styled_df, use_container_width=True)
+mode = st.radio("Mode", ["Highlight matrix", "Natural classes"], horizontal=True)
+
+
+def slashes(segments) -> str:
+    return "/" + " ".join(segments) + "/" if segments else "(none)"
+
+
+def bundle_label(spec) -> str:
+    return "[" + ", ".join(f"{value}{feature}" for feature, value in spec) + "]" if spec else "[ ] (all segments)"
+
+
+if mode == "Highlight matrix":
+    # --- UI Selectors ---
+    st.caption("If none is selected for both, no additional highlights appear.")
+    selected_row = st.selectbox("Highlight Feature (row)", [""] + list(df.index))
+    selected_col = st.selectbox("Highlight Consonant (column)", [""] + list(df.columns))
+
+    st.info("📌 'Strident' vs. 'Sibilant': Regarding the [strident] feature: /f, v/ are technically classified as [+strident]. However, in English, /f, v/ do not pattern like the other [+strident] consonants. For this reason, the term 'sibilants' is used as a cover term for the six [+strident, +coronal] sounds.")
+    st.info("📌 Note also that 'stridents' and 'sibilants', in English linguistics, can be used interchangeably in the exam, referring to the 6 sounds /s, z, ʃ, ʒ, tʃ, dʒ/.")
+    # --- Display Matrix ---
+    # Styled from whole-array masks and memoized per (row, column) selection
+    with timed("feature matrix render"):
+        st.dataframe(styled_matrix(selected_row, selected_col), width="stretch")
+
+else:
+    index = get_natural_class_index()
+
+    # --- Feature bundle -> segments ---
+    st.markdown("##### 🔎 Which consonants does a feature bundle pick out?")
+    bundle = {}
+    cols = st.columns(4)
+    for i, feature in enumerate(index.features):
+        with cols[i % 4]:
+            value = st.selectbox(feature, ["any", "+", "-"], key=f"nc_{feature}")
+        if value != "any":
+            bundle[feature] = value
+    matched = index.match(bundle)
+    st.success(f"{bundle_label(tuple(bundle.items()))} → {slashes(matched)} ({len(matched)})")
+
+    # --- Segments -> minimal bundles ---
+    st.markdown("##### 🧩 Minimal feature specification for a set of consonants")
+    chosen = st.multiselect("Consonants", list(index.segments), key="nc_segments",
+                            placeholder="e.g., s z ʃ ʒ tʃ dʒ")
+    if chosen:
+        t0 = time.perf_counter()
+        solution = index.solve(chosen)
+        elapsed = (time.perf_counter() - t0) * 1000
+        if solution.exact:
+            n = len(solution.specs[0])
+            st.success(f"{slashes(solution.target)} is a natural class. "
+                       f"Minimal specification{'s' if len(solution.specs) > 1 else ''} ({n} feature{'s' if n != 1 else ''}):")
+            for spec in solution.specs:
+                st.markdown(f"- **{bundle_label(spec)}**")
+        else:
+            extra = [seg for seg in solution.closest if seg not in solution.target]
+            st.warning(f"{slashes(solution.target)} is not a natural class. The smallest class containing it is "
+                       f"{slashes(solution.closest)}, which also includes {slashes(extra)}.")
+        st.caption(f"Solved in {elapsed:.2f} ms")
+
+end_page()
@@ -2,6 +2,13 @@ import streamlit as st
 import random
 import re
 
+from utils.adaptive import AdaptiveScheduler
+from utils.attempt_log import QUIZ1_DIFFERENCE, QUIZ1_SYMBOL, log_attempt
+from utils.metrics import end_page, start_page
+from utils.phonemes import LABELS as PHONEME_LABELS, get_pair_table, get_phoneme_store, quiz_consonants
+
+start_page("IPA Description Quiz I")
+
 # ---- Score display
 
 # Initialize per-session score tracking
@@ -16,33 +23,9 @@ if "tab3_total" not in st.session_state:
 
 
 
-# --- IPA Consonant Dictionary ---
-consonants = [
-    {"symbol": "p", "voicing": "voiceless", "place": "bilabial", "oro_nasal": "oral", "centrality": "(central)", "manner": "plosive"},
-    {"symbol": "b", "voicing": "voiced", "place": "bilabial", "oro_nasal": "oral", "centrality": "(central)", "manner": "plosive"},
-    {"symbol": "t", "voicing": "voiceless", "place": "alveolar", "oro_nasal": "oral", "centrality": "(central)", "manner": "plosive"},
-    {"symbol": "d", "voicing": "voiced", "place": "alveolar", "oro_nasal": "oral", "centrality": "(central)", "manner": "plosive"},
-    {"symbol": "k", "voicing": "voiceless", "place": "velar", "oro_nasal": "oral", "centrality": "(central)", "manner": "plosive"},
-    {"symbol": "g", "voicing": "voiced", "place": "velar", "oro_nasal": "oral", "centrality": "(central)", "manner": "plosive"},
-    {"symbol": "f", "voicing": "voiceless", "place": "labiodental", "oro_nasal": "oral", "centrality": "(central)", "manner": "fricative"},
-    {"symbol": "v", "voicing": "voiced", "place": "labiodental", "oro_nasal": "oral", "centrality": "(central)", "manner": "fricative"},
-    {"symbol": "θ", "voicing": "voiceless", "place": "dental", "oro_nasal": "oral", "centrality": "(central)", "manner": "fricative"},
-    {"symbol": "ð", "voicing": "voiced", "place": "dental", "oro_nasal": "oral", "centrality": "(central)", "manner": "fricative"},
-    {"symbol": "s", "voicing": "voiceless", "place": "alveolar", "oro_nasal": "oral", "centrality": "(central)", "manner": "fricative"},
-    {"symbol": "z", "voicing": "voiced", "place": "alveolar", "oro_nasal": "oral", "centrality": "(central)", "manner": "fricative"},
-    {"symbol": "ʃ", "voicing": "voiceless", "place": "post-alveolar", "oro_nasal": "oral", "centrality": "(central)", "manner": "fricative"},
-    {"symbol": "ʒ", "voicing": "voiced", "place": "post-alveolar", "oro_nasal": "oral", "centrality": "(central)", "manner": "fricative"},
-    {"symbol": "h", "voicing": "voiceless", "place": "glottal", "oro_nasal": "oral", "centrality": "(central)", "manner": "fricative"},
-    {"symbol": "tʃ", "voicing": "voiceless", "place": "post-alveolar", "oro_nasal": "oral", "centrality": "(central)", "manner": "affricate"},
-    {"symbol": "dʒ", "voicing": "voiced", "place": "post-alveolar", "oro_nasal": "oral", "centrality": "(central)", "manner": "affricate"},
-    {"symbol": "m", "voicing": "voiced", "place": "bilabial", "oro_nasal": "nasal", "centrality": "(central)", "manner": "nasal"},
-    {"symbol": "n", "voicing": "voiced", "place": "alveolar", "oro_nasal": "nasal", "centrality": "(central)", "manner": "nasal"},
-    {"symbol": "ŋ", "voicing": "voiced", "place": "velar", "oro_nasal": "nasal", "centrality": "(central)", "manner": "nasal"},
-    {"symbol": "l", "voicing": "voiced", "place": "alveolar", "oro_nasal": "oral", "centrality": "lateral", "manner": "approximant "},
-    {"symbol": "ɹ", "voicing": "voiced", "place": "alveolar", "oro_nasal": "oral", "centrality": "(central)", "manner": "approximant"},
-    {"symbol": "j", "voicing": "voiced", "place": "palatal", "oro_nasal": "oral", "centrality": "(central)", "manner": "glide"},
-    {"symbol": "w", "voicing": "voiced", "place": "labio-velar", "oro_nasal": "oral", "centrality": "(central)", "manner": "glide"},
-]
+# --- IPA Consonant Dictionary (shared store, built once per process) ---
+consonants = quiz_consonants()
+store = get_phoneme_store()
 
 def display_score(tab_label):
     score = st.session_state[f"{tab_label}_score"]
@@ -57,58 +40,41 @@ tab1, tab2, tab3 = st.tabs(["[1] Explore Sounds", "[2] Identify Symbol", "[3] Id
 with tab1:
     st.header("🔎 IPA Sound Filter")
 
-    voicing = st.selectbox("[1] Voicing (VD vs. VL)", ["Any", "voiced", "voiceless"])
-    place = st.selectbox("[2] Place of articulation", ["Any", "bilabial", "labiodental", "dental", "alveolar", "post-alveolar", "palatal", "labio-velar", "velar", "glottal"])
-    oro_nasal = st.selectbox("[3] Oro-nasal process (Oral vs. Nasal)", ["Any", "oral", "nasal"])
-    centrality = st.selectbox("[4] Centrality (Central vs. Lateral)", ["Any", "(central)", "lateral"])
-    manner = st.selectbox("[5] Manner of articulation", ["Any", "plosive", "nasal", "fricative", "affricate", "approximant (lateral)", "approximant (non-lateral)", "glide"])
-
-    # Define place articulation order
-    place_order = {
-        "bilabial": 1,
-        "labiodental": 2,
-        "dental": 3,
-        "alveolar": 4,
-        "post-alveolar": 5,
-        "palatal": 6,
-        "labio-velar": 7,
-        "velar": 8,
-        "glottal": 9
+    # Every facet shows how many sounds each choice would leave given the
+    # other facets; choices that would leave none are not offered.
+    facets = [
+        ("voicing", "[1] Voicing (VD vs. VL)"),
+        ("place", "[2] Place of articulation"),
+        ("oro_nasal", "[3] Oro-nasal process (Oral vs. Nasal)"),
+        ("centrality", "[4] Centrality (Central vs. Lateral)"),
+        ("manner", "[5] Manner of articulation"),
+    ]
+    selection = {
+        attr: st.session_state[f"tab1_{attr}"]
+        for attr, _ in facets
+        if st.session_state.get(f"tab1_{attr}", "Any") != "Any"
     }
+    counts = store.facet_counts(selection)
 
-    # Filter consonants
-    filtered = [
-        c for c in consonants
-        if (voicing == "Any" or c["voicing"] == voicing)
-        and (place == "Any" or c["place"] == place)
-        and (oro_nasal == "Any" or c["oro_nasal"] == oro_nasal)
-        and (centrality == "Any" or c["centrality"] == centrality)
-        and (manner == "Any" or c["manner"] == manner)
-    ]
+    for attr, label in facets:
+        current = selection.get(attr)
+        options = ["Any"] + [v for v in PHONEME_LABELS[attr] if counts[attr][v] or v == current]
+        st.selectbox(
+            label, options, key=f"tab1_{attr}",
+            format_func=lambda v, n=counts[attr]: f"{v} ({n[None if v == 'Any' else v]})",
+        )
 
-    # Sort by place of articulation
-    filtered.sort(key=lambda c: place_order.get(c["place"], 99))
+    # Filter consonants
+    filtered = store.filter_mask(selection)
 
-    st.markdown(f"### 🎯 {len(filtered)} result(s):")
+    st.markdown(f"### 🎯 {filtered.bit_count()} result(s):")
 
     if filtered:
-        # Sort by place of articulation (following typical order)
-        place_order = [
-            "bilabial", "labiodental", "dental", "alveolar",
-            "post-alveolar", "palatal", "labio-velar", "velar", "glottal"
-        ]
-
-        place_groups = {}
-        for c in filtered:
-            place = c["place"]
-            if place not in place_groups:
-                place_groups[place] = []
-            place_groups[place].append(c["symbol"])
-
-        # Display grouped sounds by place in the defined order
-        for place in place_order:
-            if place in place_groups:
-                symbols = ", ".join([f"<span style='font-size:1.6em'>{s}</span>" for s in place_groups[place]])
+        # Display grouped sounds by place, following the typical order
+        for place in PHONEME_LABELS["place"]:
+            symbols = store.symbols_of(filtered & store.mask("place", place))
+            if symbols:
+                symbols = ", ".join([f"<span style='font-size:1.6em'>{s}</span>" for s in symbols])
                 st.markdown(f"{symbols} <span style='color:gray'>({place})</span><br>", unsafe_allow_html=True)
     else:
         st.info("No matching sounds found.")
@@ -131,14 +97,22 @@ with tab2:
     if "answer" not in st.session_state:
         st.session_state.answer = None
 
+    # Per-session adaptive order: missed symbols come back sooner, and
+    # distractors favour the symbols this student confuses with the target
+    if "tab2_scheduler" not in st.session_state:
+        st.session_state.tab2_scheduler = AdaptiveScheduler(c["symbol"] for c in consonants)
+    scheduler = st.session_state.tab2_scheduler
+
     def new_question():
-        st.session_state.current_question = random.choice(consonants)
-        correct = st.session_state.current_question
-        distractors = random.sample([c for c in consonants if c != correct], 4)
+        target = scheduler.next()
+        correct = consonants[store.row[target]]
+        st.session_state.current_question = correct
+        distractors = [consonants[store.row[s]] for s in scheduler.distractors(target, 4)]
         options = distractors + [correct]
         random.shuffle(options)
         st.session_state.options = options
         st.session_state.answer = correct['symbol']
+        st.session_state.tab2_recorded = False
 
     # Trigger new question at start or after "Next"
     if st.session_state.current_question is None:
@@ -176,6 +150,12 @@ with tab2:
         with col1:
             if st.button("Check answer", key="tab2_check_btn"):
                 st.session_state.tab2_total += 1
+                if not st.session_state.get("tab2_recorded", True):
+                    # Only the first try at a question feeds the scheduler
+                    shown = [c['symbol'] for c in st.session_state.options]
+                    scheduler.record(st.session_state.answer, choice, shown)
+                    st.session_state.tab2_recorded = True
+                log_attempt(QUIZ1_SYMBOL, st.session_state.answer, choice == st.session_state.answer)
                 if choice == st.session_state.answer:
                     st.session_state.tab2_score += 1
                     st.success("✅ Correct!")
@@ -197,6 +177,10 @@ with tab2:
                     del st.session_state[key]
                 st.rerun()
 
+        weakest = [sym for sym, rate in scheduler.weakest(5) if scheduler.stats[sym].errors]
+        if weakest:
+            st.caption(f"Coming back more often: {', '.join(weakest)}")
+
 
 
 # ----------------- TAB 3 -----------------
@@ -205,41 +189,35 @@ with tab3:
 
     display_score("tab3")
 
-    # Fixed options for difference types
-    diff_options = [
-        "Voicing",
-        "Place",
-        "Oro-nasal process (oral vs. nasal)",
-        "Centrality (central vs. lateral)",
-        "Manner"
-    ]
+    # Fixed options for difference types, in the pair table's attribute order
+    pairs = get_pair_table()
+    diff_labels = {
+        "voicing": "Voicing",
+        "place": "Place",
+        "oro_nasal": "Oro-nasal process (oral vs. nasal)",
+        "centrality": "Centrality (central vs. lateral)",
+        "manner": "Manner",
+    }
+    diff_options = [diff_labels[a] for a in pairs.attributes]
 
-    def get_key_differences(c1, c2):
-        """Return a list of ALL features that differ between c1 and c2."""
-        diffs = []
-        if c1["voicing"] != c2["voicing"]:
-            diffs.append("Voicing")
-        if c1["place"] != c2["place"]:
-            diffs.append("Place")
-        if c1["oro_nasal"] != c2["oro_nasal"]:
-            diffs.append("Oro-nasal process (oral vs. nasal)")
-        if c1["centrality"] != c2["centrality"]:
-            diffs.append("Centrality (central vs. lateral)")
-        if c1["manner"] != c2["manner"]:
-            diffs.append("Manner")
-        return diffs
+    def get_key_differences(mask):
+        """Return a list of ALL features set in a pair's difference mask."""
+        return [diff_labels[a] for a in pairs.attributes_of(mask)]
 
     def new_pair():
-        while True:
-            c1, c2 = random.sample(consonants, 2)
-            diffs = get_key_differences(c1, c2)
-            if diffs:
-                st.session_state.pair = (c1, c2)
-                st.session_state.key_diffs = diffs
-                st.session_state.tab3_round = st.session_state.get("tab3_round", 0) + 1
-                break
-
-    if "pair" not in st.session_state or "key_diffs" not in st.session_state:
+        level = st.session_state.get("tab3_level", "Any")
+        i, j, mask = pairs.draw(None if level == "Any" else level)
+        st.session_state.pair = (consonants[i], consonants[j])
+        st.session_state.key_mask = mask
+        st.session_state.key_diffs = get_key_differences(mask)
+        st.session_state.tab3_round = st.session_state.get("tab3_round", 0) + 1
+
+    st.radio(
+        "Difficulty (number of differing features)", ["Any", *pairs.levels],
+        key="tab3_level", horizontal=True, on_change=new_pair,
+    )
+
+    if "pair" not in st.session_state or "key_mask" not in st.session_state:
         new_pair()
     if "tab3_round" not in st.session_state:
         st.session_state.tab3_round = 0
@@ -273,6 +251,7 @@ with tab3:
         checked = st.checkbox(option, key=f"tab3_cb_{st.session_state.tab3_round}_{option}")
         if checked:
             tab3_choice.append(option)
+    choice_mask = sum(1 << j for j, option in enumerate(diff_options) if option in tab3_choice)
 
     # Buttons
     col1, col2, col3 = st.columns([1, 1, 1])
@@ -280,7 +259,9 @@ with tab3:
     with col1:
         if st.button("Check answer", key="tab3_check_btn"):
             st.session_state.tab3_total += 1
-            if set(tab3_choice) == set(st.session_state.key_diffs):
+            log_attempt(QUIZ1_DIFFERENCE, " / ".join(sorted((c1["symbol"], c2["symbol"]))),
+                        choice_mask == st.session_state.key_mask)
+            if choice_mask == st.session_state.key_mask:
                 st.session_state.tab3_score += 1
                 st.success(f"✅ Correct! The key difference(s): {', '.join(st.session_state.key_diffs)}")
             else:
@@ -302,3 +283,5 @@ with tab3:
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
             st.rerun()
+
+end_page()
@@ -1,22 +1,23 @@
 import streamlit as st
-import pandas as pd
 import random
-import streamlit.components.v1 as components
+import uuid
 
-DATA_URL = "https://raw.githubusercontent.com/MK316/APP4U/refs/heads/main/data/phon_terminology.csv"
+from utils.attempt_log import FLASHCARDS, log_attempt
+from utils.datasets import load_df
+from utils.flashcard_deck import flashcard_deck
+from utils.metrics import end_page, start_page
+from utils.srs import CardState, get_card_store
 
 st.set_page_config(page_title="Phonetics & Phonology Flashcards", page_icon="🃏", layout="centered")
+start_page("Terminology practice")
 
 # ---------------------------------------------------------------------------
 # Data
 # ---------------------------------------------------------------------------
-@st.cache_data
-def load_data():
-    df = pd.read_csv(DATA_URL)
-    df = df.dropna(subset=["Terminology", "Description"])
-    return df.reset_index(drop=True)
-
-df = load_data()
+# Rows without a term/description are dropped by the loader
+df = load_df("Terminology")
+# Cards are identified by their term, so progress survives row reordering
+store = get_card_store()
 
 # ---------------------------------------------------------------------------
 # Session state
@@ -24,127 +25,71 @@ df = load_data()
 defaults = {
     "stage": "setup",     # setup -> quiz -> done
     "deck": [],
-    "idx": 0,
+    "deck_token": "",     # names this deck's progress in the browser
+    "graded": set(),      # deck positions whose grades have reached the server
     "score": 0,
     "attempts": 0,
-    "graded_this_card": False,
+    "user": "",           # progress is saved under this name ("" = not saved)
+    "card_states": {},    # term -> CardState for this deck
 }
 for k, v in defaults.items():
     if k not in st.session_state:
         st.session_state[k] = v
 
 
-def start_practice(n):
-    sample = df.sample(n=n, replace=False).to_dict("records")
+def start_practice(n, user):
+    if user:
+        # Due cards first, then new ones, then the ones coming up soonest
+        terms = store.build_deck(user, df["Terminology"], n, random)
+        st.session_state.card_states = store.states(user)
+        sample = df.set_index("Terminology", drop=False).loc[terms].to_dict("records")
+    else:
+        sample = df.sample(n=n, replace=False).to_dict("records")
+        st.session_state.card_states = {}
+    st.session_state.user = user
     st.session_state.deck = sample
-    st.session_state.idx = 0
+    st.session_state.deck_token = uuid.uuid4().hex
+    st.session_state.graded = set()
     st.session_state.score = 0
     st.session_state.attempts = 0
-    st.session_state.graded_this_card = False
     st.session_state.stage = "quiz"
 
 
 def restart():
     st.session_state.stage = "setup"
     st.session_state.deck = []
-    st.session_state.idx = 0
+    st.session_state.deck_token = ""
+    st.session_state.graded = set()
     st.session_state.score = 0
     st.session_state.attempts = 0
-    st.session_state.graded_this_card = False
 
 
-def grade(correct):
-    if not st.session_state.graded_this_card:
+def apply_results(payload):
+    """Record a batch of grades sent back by the deck; returns True once the deck is done."""
+    if not payload or payload.get("deck") != st.session_state.deck_token:
+        return False
+    deck, graded = st.session_state.deck, st.session_state.graded
+    states = st.session_state.card_states
+    for idx, correct in payload.get("results", []):
+        if idx in graded or not 0 <= idx < len(deck):
+            continue  # already counted (a resent batch) or not from this deck
+        graded.add(idx)
         st.session_state.attempts += 1
         if correct:
             st.session_state.score += 1
-        st.session_state.graded_this_card = True
-
-
-def next_card():
-    st.session_state.idx += 1
-    st.session_state.graded_this_card = False
+        term = deck[idx]["Terminology"]
+        log_attempt(FLASHCARDS, term, bool(correct))
+        if st.session_state.user:
+            states[term] = store.grade(st.session_state.user, term, states.get(term, CardState()), bool(correct))
+    return bool(payload.get("done"))
 
 
-# ---------------------------------------------------------------------------
-# Flip-card component (pure client-side flip; scoring buttons are native
-# Streamlit widgets rendered underneath so reruns are always reliable)
-# ---------------------------------------------------------------------------
-def render_flip_card(description, example, term, card_key):
-    html = f"""
-    <html>
-    <head>
-    <link href="https://fonts.googleapis.com/css2?family=Playfair+Display:wght@700;800&family=Inter:wght@400;500;600&display=swap" rel="stylesheet">
-    <style>
-      * {{ box-sizing: border-box; }}
-      body {{ margin: 0; font-family: 'Inter', sans-serif; }}
-      .stage {{ perspective: 1600px; width: 100%; height: 380px; }}
-      .flip-card {{
-        position: relative; width: 100%; height: 100%;
-        cursor: pointer; transition: transform 0.65s cubic-bezier(.4,.2,.2,1);
-        transform-style: preserve-3d;
-      }}
-      .flip-card.flipped {{ transform: rotateY(180deg); }}
-      .face {{
-        position: absolute; inset: 0; border-radius: 20px;
-        backface-visibility: hidden; padding: 30px 34px;
-        display: flex; flex-direction: column; justify-content: center;
-        box-shadow: 0 10px 30px rgba(20,22,48,0.25);
-      }}
-      .front {{
-        background: linear-gradient(155deg, #1B1F3B 0%, #262B52 100%);
-        color: #F4EFE6;
-      }}
-      .back {{
-        background: #F4EFE6;
-        color: #1B1F3B;
-        transform: rotateY(180deg);
-        text-align: center;
-        align-items: center;
-      }}
-      .eyebrow {{
-        font-size: 12px; letter-spacing: 2.5px; text-transform: uppercase;
-        color: #E8A33D; font-weight: 600; margin-bottom: 14px;
-      }}
-      .desc {{
-        font-size: 16.5px; line-height: 1.55; margin-bottom: 16px;
-        max-height: 190px; overflow-y: auto; padding-right: 6px;
-      }}
-      .example {{
-        font-size: 14.5px; line-height: 1.5; color: #C9CCE6;
-        border-top: 1px solid rgba(244,239,230,0.25); padding-top: 12px;
-        font-style: italic;
-      }}
-      .term {{
-        font-family: 'Playfair Display', serif; font-weight: 800;
-        font-size: 34px; margin-bottom: 10px; line-height: 1.15;
-      }}
-      .hint {{
-        font-size: 12.5px; color: #6b6f8f; letter-spacing: 1px;
-        text-transform: uppercase; margin-top: 18px;
-      }}
-      .backline {{ width: 46px; height: 3px; background: #E8A33D; margin-bottom: 16px; border-radius: 2px; }}
-    </style>
-    </head>
-    <body>
-      <div class="stage">
-        <div class="flip-card" id="card-{card_key}" onclick="this.classList.toggle('flipped')">
-          <div class="face front">
-            <div class="eyebrow">Term #{card_key} · Tap card to reveal</div>
-            <div class="desc">{description}</div>
-            <div class="example">{example}</div>
-          </div>
-          <div class="face back">
-            <div class="backline"></div>
-            <div class="term">{term}</div>
-            <div class="hint">Tap again to flip back</div>
-          </div>
-        </div>
-      </div>
-    </body>
-    </html>
-    """
-    components.html(html, height=400)
+def deck_cards(deck):
+    return [
+        {"term": c["Terminology"], "description": c["Description"],
+         "example": c.get("Example", ""), "number": int(c.get("Number", i))}
+        for i, c in enumerate(deck)
+    ]
 
 
 # ---------------------------------------------------------------------------
@@ -154,56 +99,38 @@ st.title("🃏 Phonetics & Phonology Flashcards")
 
 if st.session_state.stage == "setup":
     st.write("Read the description and example, tap the card to reveal the term, then grade yourself.")
+    user = st.text_input(
+        "Your name (optional, saves your progress so due cards come back first)",
+        value=st.session_state.user,
+    ).strip()
+    if user:
+        due = store.due_count(user)
+        st.caption(f"{due} card(s) due for review." if due else "No cards due right now: new and upcoming cards first.")
     max_n = len(df)
     n = st.number_input(
         f"How many terms would you like to practice? (1–{max_n})",
         min_value=1, max_value=max_n, value=min(15, max_n), step=1,
     )
     if st.button("▶️ Start practice", type="primary"):
-        start_practice(int(n))
+        start_practice(int(n), user)
         st.rerun()
 
 # ---------------------------------------------------------------------------
 # UI: quiz screen
 # ---------------------------------------------------------------------------
 elif st.session_state.stage == "quiz":
-    deck = st.session_state.deck
-    total = len(deck)
-    idx = st.session_state.idx
-
-    if idx >= total:
-        st.session_state.stage = "done"
-        st.rerun()
-
-    card = deck[idx]
-
-    st.progress(idx / total, text=f"Card {idx + 1} of {total}  ·  Score: {st.session_state.score}/{st.session_state.attempts}")
-
-    render_flip_card(
-        description=card["Description"],
-        example=card.get("Example", ""),
-        term=card["Terminology"],
-        card_key=int(card.get("Number", idx)),
+    # The deck runs in the browser: flipping, grading and advancing cost no
+    # reruns, and the grades come back in one batch at the end.
+    result = flashcard_deck(
+        deck_cards(st.session_state.deck), st.session_state.deck_token,
+        start=len(st.session_state.graded), score=st.session_state.score,
+        attempts=st.session_state.attempts,
     )
-
-    st.caption("Click the card above to flip it and see the answer, then grade yourself below.")
-
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("✅ Got it right", use_container_width=True, disabled=st.session_state.graded_this_card):
-            grade(True)
-    with col2:
-        if st.button("❌ Missed it", use_container_width=True, disabled=st.session_state.graded_this_card):
-            grade(False)
-
-    st.write("")
-    next_label = "Next card ▶️" if idx < total - 1 else "Finish 🏁"
-    if st.button(next_label, type="primary", use_container_width=True, disabled=not st.session_state.graded_this_card):
-        next_card()
+    if apply_results(result.results):
+        st.session_state.stage = "done"
         st.rerun()
 
-    if not st.session_state.graded_this_card:
-        st.info("Grade yourself (Got it right / Missed it) before moving on.")
+    st.caption("Click the card to flip it and see the answer, then grade yourself below it.")
 
     st.write("")
     if st.button("🔁 Restart session"):
@@ -214,6 +141,7 @@ elif st.session_state.stage == "quiz":
 # UI: results screen
 # ---------------------------------------------------------------------------
 elif st.session_state.stage == "done":
+    store.flush()
     score = st.session_state.score
     total = st.session_state.attempts
     st.subheader("Session complete!")
@@ -229,3 +157,5 @@ elif st.session_state.stage == "done":
     if st.button("🔁 Practice again", type="primary"):
         restart()
         st.rerun()
+
+end_page()
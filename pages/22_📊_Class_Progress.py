@@ -0,0 +1,96 @@
+import datetime as dt
+import hmac
+import os
+
+import pandas as pd
+import streamlit as st
+
+from utils.attempt_log import ALL_ACTIVITIES, get_attempt_log
+from utils.metrics import end_page, start_page
+
+start_page("Class Progress")
+
+st.title("📊 Class Progress")
+st.caption("Attempts from the IPA quizzes and the terminology flashcards, across all students. "
+           "New attempts show up within a few seconds.")
+
+# Students' names and scores are shown only to whoever holds APP4U_INSTRUCTOR_KEY
+key = os.environ.get("APP4U_INSTRUCTOR_KEY")
+if not key:
+    st.warning("The class dashboard is disabled: set APP4U_INSTRUCTOR_KEY on the server to enable it.")
+    end_page()
+    st.stop()
+entered = st.text_input("Instructor key", type="password")
+if not entered:
+    st.info("Enter the instructor key to see the class dashboard.")
+    end_page()
+    st.stop()
+# Bytes, not str: compare_digest rejects non-ASCII strings (e.g. Korean input)
+if not hmac.compare_digest(entered.encode("utf-8"), key.encode("utf-8")):
+    st.error("That instructor key is not correct.")
+    end_page()
+    st.stop()
+
+# Every query below reads the precomputed rollups, never the attempt log itself
+log = get_attempt_log()
+activity = st.selectbox("Activity", log.activities())
+
+students = pd.DataFrame(log.students(activity), columns=["student", "attempts", "correct", "first_ts", "last_ts"])
+if students.empty:
+    st.info("No attempts logged yet.")
+    end_page()
+    st.stop()
+
+total, correct = int(students["attempts"].sum()), int(students["correct"].sum())
+col1, col2, col3 = st.columns(3)
+col1.metric("Students", len(students))
+col2.metric("Attempts", f"{total:,}")
+col3.metric("Accuracy", f"{correct / total:.0%}")
+
+
+def with_accuracy(df: pd.DataFrame) -> pd.DataFrame:
+    return df.assign(accuracy=(100 * df["correct"] / df["attempts"]).round(1))
+
+
+# ---- Per student
+st.subheader("Students")
+students = with_accuracy(students).assign(
+    last_active=pd.to_datetime(students["last_ts"], unit="s", utc=True)
+    .dt.tz_convert(dt.datetime.now().astimezone().tzinfo).dt.tz_localize(None).dt.floor("min"),
+)
+st.dataframe(
+    students[["student", "attempts", "correct", "accuracy", "last_active"]].sort_values("student"),
+    width="stretch", hide_index=True,
+    column_config={"accuracy": st.column_config.NumberColumn("accuracy (%)")},
+)
+
+# ---- Per item
+st.subheader("Hardest items")
+items = pd.DataFrame(log.items(activity), columns=["activity", "item", "attempts", "correct", "students"])
+min_attempts = st.slider("Minimum attempts per item", 1, 50, 5)
+items = with_accuracy(items[items["attempts"] >= min_attempts])
+if items.empty:
+    st.info("No item has that many attempts yet.")
+else:
+    st.dataframe(
+        items.sort_values(["accuracy", "attempts"], ascending=[True, False]).head(30),
+        width="stretch", hide_index=True,
+        column_config={"accuracy": st.column_config.NumberColumn("accuracy (%)")},
+    )
+
+# ---- Per day
+st.subheader("Daily activity")
+days_back = st.select_slider("Show the last", [7, 14, 30, 90, 365], value=30, format_func=lambda d: f"{d} days")
+since = (dt.date.today() - dt.timedelta(days=days_back - 1)).isoformat()
+days = pd.DataFrame(log.days(activity, since), columns=["day", "attempts", "correct", "students"])
+if days.empty:
+    st.info("No attempts in that period.")
+else:
+    days = with_accuracy(days).set_index("day")
+    st.line_chart(days[["attempts", "students"]])
+    st.dataframe(days.sort_index(ascending=False), width="stretch")
+
+if activity != ALL_ACTIVITIES:
+    st.caption("Pick \"(all activities)\" for totals across the quizzes and flashcards.")
+
+end_page()
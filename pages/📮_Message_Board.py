@@ -1,6 +1,10 @@
 import streamlit as st
 import streamlit.components.v1 as components
 
+from utils.metrics import end_page, start_page
+
+start_page("Message Board")
+
 def main():
     st.caption("💙 Greetings! Feel free to leave any feedback, suggestions, or messages about the application on this page. I'll make sure to look into them as soon as I can! 😍")
     st.write("➡️ Click the '+' sign to write.")
@@ -15,3 +19,5 @@ def main():
 
 if __name__ == "__main__":
     main()
+
+end_page()
@@ -0,0 +1,44 @@
+import random
+
+from utils.trigram import TrigramIndex, edit_distance, max_edits_for, tokenize
+
+TEXTS = [
+    "the tense of the verb",
+    "a tenth case of lenition",
+    "low vowels and glides",
+    "aspiration of voiceless stops",
+]
+
+
+def test_one_edit_typos_in_short_words_are_found():
+    index = TrigramIndex(TEXTS)
+    for typo, row in [("tenes", 0), ("tnse", 0), ("tesne", 0), ("lwo", 2), ("vowles", 2), ("stosp", 3)]:
+        assert row in [r for r, _ in index.search(typo)], typo
+
+
+def test_edit_limit_is_respected():
+    index = TrigramIndex(TEXTS)
+    assert index.search("xo") == []          # two letters: exact matches only
+    assert index.search("tqqse") == []       # two edits in a five-letter word
+
+
+def test_similar_words_matches_a_full_vocabulary_scan():
+    index = TrigramIndex(TEXTS)
+    rng = random.Random(0)
+    vocab = sorted({w for t in TEXTS for w in tokenize(t)})
+    for _ in range(500):
+        word = list(rng.choice(vocab))
+        i = rng.randrange(len(word))
+        op = rng.choice("sdit")
+        if op == "s":
+            word[i] = rng.choice("aeiostx")
+        elif op == "d" and len(word) > 1:
+            del word[i]
+        elif op == "i":
+            word.insert(i, rng.choice("aeiostx"))
+        elif i + 1 < len(word):
+            word[i], word[i + 1] = word[i + 1], word[i]
+        query = "".join(word)
+        limit = max_edits_for(query)
+        expected = {w for w in index.words if edit_distance(query, w, limit) <= limit}
+        assert {index.words[wid] for wid, _ in index.similar_words(query)} == expected, query
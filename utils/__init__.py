@@ -0,0 +1 @@
+"""Shared helpers for the APP4U Streamlit pages (not a page itself)."""
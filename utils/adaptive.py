@@ -0,0 +1,115 @@
+"""Adaptive question order for symbol-identification quizzes (one per session).
+
+Each symbol waits in a heap keyed by (due question number, -error rate).
+The next question pops the heap in O(log n). Symbols start due one per
+question in random order, so unseen symbols keep being introduced while
+missed ones are retried. A miss brings the symbol back RETRY_GAP questions
+later. A correct answer pushes it further out, and each correct answer in a
+row doubles that gap, shrunk by the symbol's error rate. Superseded heap entries are skipped when popped.
+
+Distractors come first from the symbols this student has confused with the
+target, ranked by how often they were picked when shown together. The rest
+are random. Nothing depends on the inventory size beyond the heap, so the
+same scheduler serves the full IPA chart.
+"""
+import heapq
+import random
+
+RETRY_GAP = 3   # questions until a missed symbol is asked again
+BASE_GAP = 6    # questions until a symbol answered correctly once comes back
+
+
+class SymbolStats:
+    __slots__ = ("attempts", "errors", "streak")
+
+    def __init__(self):
+        self.attempts = 0
+        self.errors = 0
+        self.streak = 0
+
+    @property
+    def error_rate(self) -> float:
+        # Smoothed so unseen symbols start at 0.5 and one answer cannot reach 0 or 1
+        return (self.errors + 1) / (self.attempts + 2)
+
+
+class AdaptiveScheduler:
+    def __init__(self, symbols, rng=random):
+        self.rng = rng
+        self.symbols = list(symbols)
+        self.stats = {s: SymbolStats() for s in self.symbols}
+        self.shown = {}      # (target, distractor) -> times shown together
+        self.confused = {}   # target -> {chosen symbol: times picked instead}
+        self.tick = 0        # questions asked so far
+        self._entry = {}     # symbol -> its live heap entry
+        self._heap = []
+        self._seq = 0
+        order = self.symbols[:]
+        rng.shuffle(order)
+        for due, symbol in enumerate(order):
+            self._push(symbol, due)
+
+    def _push(self, symbol: str, due: int) -> None:
+        self._seq += 1
+        entry = (due, -self.stats[symbol].error_rate, self._seq, symbol)
+        self._entry[symbol] = entry
+        heapq.heappush(self._heap, entry)
+        if len(self._heap) > 4 * len(self.symbols):
+            self._heap = list(self._entry.values())
+            heapq.heapify(self._heap)
+
+    # ---------------------------
+    # Asking
+    # ---------------------------
+    def next(self) -> str:
+        """The most urgent symbol. It stays queued in case it is skipped unanswered."""
+        while True:
+            entry = heapq.heappop(self._heap)
+            symbol = entry[3]
+            if self._entry.get(symbol) is entry:
+                break
+        self.tick += 1
+        self._push(symbol, self.tick + RETRY_GAP)
+        return symbol
+
+    def distractors(self, target: str, k: int) -> list[str]:
+        """`k` other symbols, the ones most often confused with `target` first."""
+        k = min(k, len(self.symbols) - 1)
+        confused = self.confused.get(target, {})
+        ranked = heapq.nlargest(
+            k, confused,
+            key=lambda s: ((confused[s] + 1) / (self.shown.get((target, s), 0) + 2), confused[s]),
+        )
+        picked = set(ranked)
+        while len(ranked) < k:
+            s = self.symbols[self.rng.randrange(len(self.symbols))]
+            if s != target and s not in picked:
+                picked.add(s)
+                ranked.append(s)
+        return ranked
+
+    # ---------------------------
+    # Answering
+    # ---------------------------
+    def record(self, target: str, chosen: str, shown) -> None:
+        """Log an answer to the question about `target` whose options were `shown`."""
+        stats = self.stats[target]
+        stats.attempts += 1
+        for s in shown:
+            if s != target:
+                self.shown[(target, s)] = self.shown.get((target, s), 0) + 1
+        if chosen == target:
+            stats.streak += 1
+            gap = max(RETRY_GAP + 1, round(BASE_GAP * 2 ** (stats.streak - 1) * (1 - stats.error_rate)))
+        else:
+            stats.errors += 1
+            stats.streak = 0
+            counts = self.confused.setdefault(target, {})
+            counts[chosen] = counts.get(chosen, 0) + 1
+            gap = RETRY_GAP
+        self._push(target, self.tick + gap)
+
+    def weakest(self, n: int = 5) -> list[tuple[str, float]]:
+        """The `n` attempted symbols with the highest error rate."""
+        seen = [s for s in self.symbols if self.stats[s].attempts]
+        return [(s, self.stats[s].error_rate) for s in heapq.nlargest(n, seen, key=lambda s: self.stats[s].error_rate)]
@@ -0,0 +1,285 @@
+"""Class-wide log of quiz and flashcard attempts, with rollups for the dashboard.
+
+Pages call `log_attempt(activity, item, correct)`, which only puts the
+attempt on a queue. A background writer thread drains the queue in batches
+(up to BATCH_SIZE attempts, or whatever arrived within FLUSH_SECONDS). Each
+batch is appended to the `attempts` table in one SQLite transaction (WAL
+mode). The same transaction adds the batch's totals to three rollup tables:
+- per student and activity
+- per item (symbol, pair or term) and activity
+- per day and activity, including how many distinct students were active
+
+Student and day rollups also get an ALL_ACTIVITIES row, so distinct-student
+counts stay exact across activities. The instructor dashboard reads only
+the rollups. Its queries touch a few rows per student, item or day, however
+long the log grows. `python -m utils.attempt_log --rebuild` recomputes the
+rollups from the log.
+
+Configuration (environment variables):
+    APP4U_ATTEMPTS_DB         database file (default ~/.cache/app4u/attempts.sqlite3)
+"""
+import argparse
+import atexit
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+from utils import metrics
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "app4u", "attempts.sqlite3")
+
+BATCH_SIZE = 500        # attempts per transaction at most
+FLUSH_SECONDS = 1.0     # how long the writer waits to fill a batch
+ALL_ACTIVITIES = "(all activities)"
+ANONYMOUS = "(anonymous)"
+
+# Activities logged by the pages
+QUIZ1_SYMBOL = "Quiz I: identify symbol"
+QUIZ1_DIFFERENCE = "Quiz I: key difference"
+QUIZ2_DESCRIBE = "Quiz II: describe symbol"
+FLASHCARDS = "Flashcards"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id          INTEGER PRIMARY KEY,
+    ts          REAL NOT NULL,
+    day         TEXT NOT NULL,      -- local date, YYYY-MM-DD
+    student     TEXT NOT NULL,
+    activity    TEXT NOT NULL,
+    item        TEXT NOT NULL,
+    correct     INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rollup_student (
+    student TEXT NOT NULL, activity TEXT NOT NULL,
+    attempts INTEGER NOT NULL, correct INTEGER NOT NULL,
+    first_ts REAL NOT NULL, last_ts REAL NOT NULL,
+    PRIMARY KEY (student, activity)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_item (
+    activity TEXT NOT NULL, item TEXT NOT NULL,
+    attempts INTEGER NOT NULL, correct INTEGER NOT NULL,
+    students INTEGER NOT NULL,
+    PRIMARY KEY (activity, item)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_day (
+    day TEXT NOT NULL, activity TEXT NOT NULL,
+    attempts INTEGER NOT NULL, correct INTEGER NOT NULL,
+    students INTEGER NOT NULL,
+    PRIMARY KEY (day, activity)
+) WITHOUT ROWID;
+-- Membership sets behind the distinct-student counts above
+CREATE TABLE IF NOT EXISTS seen_item_student (
+    activity TEXT NOT NULL, item TEXT NOT NULL, student TEXT NOT NULL,
+    PRIMARY KEY (activity, item, student)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS seen_day_student (
+    day TEXT NOT NULL, activity TEXT NOT NULL, student TEXT NOT NULL,
+    PRIMARY KEY (day, activity, student)
+) WITHOUT ROWID;
+"""
+
+ROLLUP_TABLES = ("rollup_student", "rollup_item", "rollup_day", "seen_item_student", "seen_day_student")
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    db = sqlite3.connect(path, check_same_thread=False, timeout=10.0)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    return db
+
+
+def _apply_rollups(db: sqlite3.Connection, rows) -> None:
+    """Add `rows` (ts, day, student, activity, item, correct) to the rollups, inside the caller's transaction."""
+    students: dict[tuple, list] = {}
+    items: dict[tuple, list] = {}
+    days: dict[tuple, list] = {}
+    for ts, day, student, activity, item, correct in rows:
+        for act in (activity, ALL_ACTIVITIES):
+            s = students.setdefault((student, act), [0, 0, ts, ts])
+            s[0] += 1
+            s[1] += correct
+            s[2] = min(s[2], ts)
+            s[3] = max(s[3], ts)
+            d = days.setdefault((day, act), [0, 0, set()])
+            d[0] += 1
+            d[1] += correct
+            d[2].add(student)
+        i = items.setdefault((activity, item), [0, 0, set()])
+        i[0] += 1
+        i[1] += correct
+        i[2].add(student)
+
+    db.executemany(
+        "INSERT INTO rollup_student VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (student, activity) DO UPDATE SET"
+        " attempts = attempts + excluded.attempts, correct = correct + excluded.correct,"
+        " first_ts = min(first_ts, excluded.first_ts), last_ts = max(last_ts, excluded.last_ts)",
+        [(*key, *v) for key, v in students.items()])
+
+    def new_students(table: str, key: tuple, members: set) -> int:
+        cur = db.executemany(f"INSERT OR IGNORE INTO {table} VALUES (?, ?, ?)", [(*key, m) for m in members])
+        return cur.rowcount
+
+    db.executemany(
+        "INSERT INTO rollup_item VALUES (?, ?, ?, ?, ?) ON CONFLICT (activity, item) DO UPDATE SET"
+        " attempts = attempts + excluded.attempts, correct = correct + excluded.correct,"
+        " students = students + excluded.students",
+        [(*key, n, c, new_students("seen_item_student", key, members)) for key, (n, c, members) in items.items()])
+    db.executemany(
+        "INSERT INTO rollup_day VALUES (?, ?, ?, ?, ?) ON CONFLICT (day, activity) DO UPDATE SET"
+        " attempts = attempts + excluded.attempts, correct = correct + excluded.correct,"
+        " students = students + excluded.students",
+        [(*key, n, c, new_students("seen_day_student", key, members)) for key, (n, c, members) in days.items()])
+
+
+class AttemptLog:
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = _connect(path)  # used by the writer thread, and by reads under the lock
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self.written = 0
+
+    # ---------------------------
+    # Writing
+    # ---------------------------
+    def log(self, student: str, activity: str, item: str, correct: bool, ts: float | None = None) -> None:
+        """Queue one attempt; never waits on the database."""
+        ts = time.time() if ts is None else ts
+        day = time.strftime("%Y-%m-%d", time.localtime(ts))
+        self._queue.put((ts, day, student or ANONYMOUS, activity, str(item), int(bool(correct))))
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="app4u-attempt-log", daemon=True)
+                    self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + FLUSH_SECONDS
+            while len(batch) < BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except sqlite3.Error as e:
+                print(f"attempt log: dropped {len(batch)} attempts: {e}", file=sys.stderr)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, rows: list[tuple]) -> None:
+        with self._lock, metrics.timed("attempt log: write"), self._db:
+            self._db.executemany(
+                "INSERT INTO attempts (ts, day, student, activity, item, correct) VALUES (?, ?, ?, ?, ?, ?)", rows)
+            _apply_rollups(self._db, rows)
+        self.written += len(rows)
+
+    def flush(self) -> None:
+        """Block until every queued attempt is written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def rebuild(self) -> int:
+        """Recompute every rollup from the attempt log; returns the attempts read."""
+        self.flush()
+        with self._lock, self._db:
+            for table in ROLLUP_TABLES:
+                self._db.execute(f"DELETE FROM {table}")
+            cur = self._db.execute("SELECT ts, day, student, activity, item, correct FROM attempts ORDER BY id")
+            total = 0
+            while rows := cur.fetchmany(50_000):
+                _apply_rollups(self._db, rows)
+                total += len(rows)
+        return total
+
+    # ---------------------------
+    # Reading (rollups only)
+    # ---------------------------
+    def _query(self, sql: str, params=()) -> list[tuple]:
+        with self._lock, metrics.timed("attempt log: query"):
+            return self._db.execute(sql, params).fetchall()
+
+    def activities(self) -> list[str]:
+        rows = self._query("SELECT DISTINCT activity FROM rollup_item ORDER BY activity")
+        return [ALL_ACTIVITIES] + [a for (a,) in rows]
+
+    def students(self, activity: str = ALL_ACTIVITIES) -> list[dict]:
+        rows = self._query(
+            "SELECT student, attempts, correct, first_ts, last_ts FROM rollup_student"
+            " WHERE activity = ? ORDER BY student", (activity,))
+        return [dict(zip(("student", "attempts", "correct", "first_ts", "last_ts"), r)) for r in rows]
+
+    def items(self, activity: str | None = None) -> list[dict]:
+        if activity in (None, ALL_ACTIVITIES):
+            rows = self._query("SELECT activity, item, attempts, correct, students FROM rollup_item")
+        else:
+            rows = self._query(
+                "SELECT activity, item, attempts, correct, students FROM rollup_item WHERE activity = ?", (activity,))
+        return [dict(zip(("activity", "item", "attempts", "correct", "students"), r)) for r in rows]
+
+    def days(self, activity: str = ALL_ACTIVITIES, since: str = "") -> list[dict]:
+        rows = self._query(
+            "SELECT day, attempts, correct, students FROM rollup_day"
+            " WHERE activity = ? AND day >= ? ORDER BY day", (activity, since))
+        return [dict(zip(("day", "attempts", "correct", "students"), r)) for r in rows]
+
+
+_log: AttemptLog | None = None
+_log_lock = threading.Lock()
+
+
+def get_attempt_log() -> AttemptLog:
+    global _log
+    if _log is None:
+        with _log_lock:
+            if _log is None:
+                _log = AttemptLog(os.environ.get("APP4U_ATTEMPTS_DB", DEFAULT_PATH))
+                atexit.register(_log.flush)
+    return _log
+
+
+def student_name() -> str:
+    """The name this browser session gave on any page (Quiz II or the flashcards)."""
+    import streamlit as st
+    for key in ("user_name", "user"):
+        name = str(st.session_state.get(key) or "").strip()
+        if name:
+            return name
+    return ANONYMOUS
+
+
+def log_attempt(activity: str, item: str, correct: bool) -> None:
+    """Log an attempt by the current session's student."""
+    get_attempt_log().log(student_name(), activity, item, correct)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect or rebuild the attempt log rollups.")
+    parser.add_argument("--rebuild", action="store_true", help="recompute the rollups from the log")
+    args = parser.parse_args(argv)
+
+    log = get_attempt_log()
+    if args.rebuild:
+        t0 = time.perf_counter()
+        n = log.rebuild()
+        print(f"Rebuilt rollups from {n} attempts in {time.perf_counter() - t0:.1f}s")
+    students = log.students()
+    print(f"{log.path}: {sum(s['attempts'] for s in students)} attempts by {len(students)} students")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,385 @@
+"""Offline benchmarks for the TCE search paths.
+
+    python -m utils.benchmark                          # shipped CSVs + 10k/100k synthetic rows
+    python -m utils.benchmark --sizes 1000000          # 1M rows; needs a large-memory machine
+    python -m utils.benchmark --sizes 10000 --queries 20
+    python -m utils.benchmark --compare bench/old.json # p50 ratios against an earlier run
+
+Per corpus it measures
+  load       CSV parsing (what load_dataset does on a cache miss) and, with
+             pyarrow, writing + memory-mapping the columnar copy
+  index      the one-off keyword, BM25 and trigram index builds
+  search     every mode in SEARCH_MODES the way the pages' search_years runs
+             it (search_rows, then the YEAR lookup), with the query cache
+             cleared before each query so every run does the real work
+  filenames  filename_variants over the corpus' Filename column
+
+and reports throughput, p50/p99 latency and peak traced memory (a second,
+tracemalloc-instrumented pass so timings are not skewed). Results are written
+as JSON under bench/ for comparison across versions.
+
+Synthetic corpora are sampled with a fixed seed from the shipped exam data:
+words per TEXT and word frequencies, keywords per row and keyword
+frequencies, YEAR and Filename values. Nothing touches the network.
+The default sizes run every benchmark on an ordinary machine (the 100k-row
+corpus takes about three minutes and peaks near 1.2 GB RSS). Corpora whose
+text would exceed --max-postings token occurrences skip the BM25/trigram
+builds and the modes that need them rather than exhausting memory; a 1M-row
+corpus does with the default. Skipped cells are not results: the run lists
+them, prints FAILED and exits with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from utils import columnar
+from utils.bm25 import BM25Index, get_bm25_index, tokenize
+from utils.datasets import ROOT, Dataset, _parse, clear_cache, load_dataset
+from utils.image_manifest import filename_variants
+from utils.keyword_index import KeywordIndex, get_keyword_index, split_keywords
+from utils.query_cache import query_cache
+from utils.search import SEARCH_MODES, SUBJECTS, search_rows
+from utils.trigram import TrigramIndex, get_trigram_index
+
+DEFAULT_SIZES = (10_000, 100_000)
+DEFAULT_QUERIES = 50
+DEFAULT_MAX_POSTINGS = 50_000_000
+SEED = 20240601
+OUT_DIR = os.path.join(ROOT, "bench")
+
+# Modes that need the TEXT indexes (skipped for oversized corpora, absent without TEXT)
+INDEXED_MODES = {"Words containing", "Fuzzy", "Query"}
+
+
+# ---------------------------
+# Corpora
+# ---------------------------
+class Distribution:
+    """Empirical TEXT / KEYWORDS / YEAR / Filename statistics of the shipped datasets."""
+
+    def __init__(self, frames):
+        words, keywords = Counter(), Counter()
+        self.text_lengths, self.keyword_counts, self.years, self.filenames = [], [], [], []
+        for df in frames:
+            if "TEXT" in df.columns:
+                for text in df["TEXT"]:
+                    tokens = tokenize(text)
+                    if tokens:
+                        self.text_lengths.append(len(tokens))
+                        words.update(tokens)
+            if "KEYWORDS" in df.columns:
+                for cell in df["KEYWORDS"]:
+                    kws = split_keywords(cell)
+                    self.keyword_counts.append(len(kws))
+                    keywords.update(kws)
+            self.years += [y for y in df["YEAR"] if y] if "YEAR" in df.columns else []
+            self.filenames += [f for f in df["Filename"] if f] if "Filename" in df.columns else []
+
+        self.words = np.array(list(words))
+        self.word_p = np.array(list(words.values()), dtype=float) / sum(words.values())
+        self.keywords = np.array(list(keywords))
+        self.keyword_p = np.array(list(keywords.values()), dtype=float) / sum(keywords.values())
+
+    def corpus(self, n: int, rng: np.random.Generator) -> pd.DataFrame:
+        lengths = rng.choice(self.text_lengths, size=n)
+        texts = []
+        for start in range(0, n, 10_000):  # bounded temporary arrays
+            chunk = lengths[start:start + 10_000]
+            ids = rng.choice(len(self.words), size=int(chunk.sum()), p=self.word_p)
+            bounds = np.concatenate(([0], np.cumsum(chunk)))
+            texts += [" ".join(self.words[ids[a:b]]) for a, b in zip(bounds[:-1], bounds[1:])]
+
+        kw_counts = rng.choice(self.keyword_counts, size=n)
+        kw_ids = rng.choice(len(self.keywords), size=int(kw_counts.sum()), p=self.keyword_p)
+        bounds = np.concatenate(([0], np.cumsum(kw_counts)))
+        keywords = [", ".join(dict.fromkeys(self.keywords[kw_ids[a:b]])) for a, b in zip(bounds[:-1], bounds[1:])]
+
+        return pd.DataFrame({
+            "Filename": rng.choice(self.filenames, size=n),
+            "YEAR": rng.choice(self.years, size=n),
+            "KEYWORDS": keywords,
+            "TEXT": texts,
+        })
+
+    def queries(self, mode: str, count: int, rng: np.random.Generator) -> list[str]:
+        years = sorted({y[:4] for y in self.years})
+        content = [w for w in self.words if len(w) >= 4 and w.isalpha()]
+        out = []
+        for i in range(count):
+            word = str(rng.choice(content))
+            kw = str(rng.choice(self.keywords, p=self.keyword_p))
+            if mode == "YEAR":
+                out.append(str(rng.choice(years)))
+            elif mode == "Keywords":
+                out.append(kw if i % 5 else f"{kw} & {rng.choice(self.keywords, p=self.keyword_p)}")
+            elif mode == "Words containing":
+                out.append(word if i % 3 else f"{word} {rng.choice(content)}")
+            elif mode == "Fuzzy":
+                pos = int(rng.integers(len(word)))
+                out.append(word[:pos] + ("x" if word[pos] != "x" else "y") + word[pos + 1:])
+            else:
+                lo, hi = sorted(rng.choice(years, size=2))
+                out.append(f"year:{lo}..{hi} kw:{kw.split()[0]}" if i % 2 else f"kw:{kw.split()[0]} OR text:{word}")
+        return out
+
+
+def shipped_corpora() -> list[tuple[str, Dataset]]:
+    return [(name, load_dataset(name)) for name in SUBJECTS]
+
+
+def synthetic_dataset(n: int, df: pd.DataFrame) -> Dataset:
+    return Dataset(name=f"synthetic-{n}", df=df, source=f"synthetic:{n}", version=f"{SEED}-{n}")
+
+
+# ---------------------------
+# Measurement
+# ---------------------------
+def _peak_mb(fn, inputs) -> float:
+    tracemalloc.start()
+    try:
+        for x in inputs:
+            fn(x)
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def measure(corpus: str, rows: int, bench: str, case: str, fn, inputs, memory: bool = True) -> dict:
+    """Time fn(x) for each input, then (optionally) trace peak memory over a second pass."""
+    latencies = []
+    t0 = time.perf_counter()
+    for x in inputs:
+        t = time.perf_counter()
+        fn(x)
+        latencies.append(time.perf_counter() - t)
+    total = time.perf_counter() - t0
+    lat_ms = np.array(latencies) * 1000
+    return {
+        "corpus": corpus, "rows": rows, "bench": bench, "case": case,
+        "runs": len(inputs),
+        "total_s": round(total, 6),
+        "throughput_per_s": round(len(inputs) / total, 3) if total else None,
+        "p50_ms": round(float(np.percentile(lat_ms, 50)), 4),
+        "p99_ms": round(float(np.percentile(lat_ms, 99)), 4),
+        "peak_mb": round(_peak_mb(fn, inputs), 3) if memory else None,
+    }
+
+
+def skipped(corpus: str, rows: int, bench: str, case: str, reason: str) -> dict:
+    return {"corpus": corpus, "rows": rows, "bench": bench, "case": case, "skipped": reason}
+
+
+def search_years(dataset: Dataset, mode: str, query: str) -> list[str]:
+    # Same path as the pages' search_years, minus Streamlit
+    query_cache.clear()
+    rows = [row for row, _ in search_rows(dataset, mode, query)]
+    return dataset.df["YEAR"].iloc[rows].tolist()
+
+
+# ---------------------------
+# Benchmarks
+# ---------------------------
+def bench_load(corpus: str, dataset: Dataset, csv_path: str) -> list[dict]:
+    rows = len(dataset.df)
+    runs = 5 if rows <= 100_000 else 1
+    with open(csv_path, "rb") as f:
+        raw = f.read()
+    # raw goes in as the timed input, so nothing but this frame keeps it alive after the del
+    out = [measure(corpus, rows, "load", "csv parse", lambda data: _parse(corpus, data), [raw] * runs)]
+    del raw  # the 1M-row CSV alone is ~1 GB
+    if columnar.pa is not None:
+        # Shipped frames may already be memory-mapped copies carrying KEYWORD_LIST
+        df = dataset.df.drop(columns=["KEYWORD_LIST"], errors="ignore")
+        table = columnar.to_table(df, dataset.version, split_keywords)
+        out.append(measure(corpus, rows, "load", "columnar write",
+                           lambda _: columnar.write_columnar(columnar.columnar_path(csv_path), table), range(runs)))
+        out.append(measure(corpus, rows, "load", "columnar mmap read",
+                           lambda _: columnar.read_columnar(csv_path, dataset.version), range(runs)))
+    return out
+
+
+def bench_indexes(corpus: str, dataset: Dataset, text_indexed: bool, reason: str,
+                  memory: bool) -> list[dict]:
+    df, rows = dataset.df, len(dataset.df)
+    builders = {
+        "keyword index": (lambda _: get_keyword_index(dataset),
+                          lambda _: KeywordIndex(split_keywords(k) for k in df["KEYWORDS"])),
+        "bm25 index": (lambda _: get_bm25_index(dataset), lambda _: BM25Index.build(df["TEXT"])),
+        "trigram index": (lambda _: get_trigram_index(dataset), lambda _: TrigramIndex(df["TEXT"])),
+    }
+    out = []
+    for case, (shared, fresh) in builders.items():
+        if case != "keyword index" and "TEXT" not in df.columns:
+            continue  # not applicable, e.g. Grammar
+        if case != "keyword index" and not text_indexed:
+            out.append(skipped(corpus, rows, "index", case, reason))
+            continue
+        result = measure(corpus, rows, "index", case, shared, [None], memory=False)
+        if memory:  # rebuild once under tracemalloc; the shared copy stays cached for search
+            result["peak_mb"] = round(_peak_mb(fresh, [None]), 3)
+        out.append(result)
+    return out
+
+
+def bench_search(corpus: str, dataset: Dataset, dist: Distribution, n_queries: int,
+                 rng: np.random.Generator, text_indexed: bool, reason: str) -> list[dict]:
+    rows = len(dataset.df)
+    out = []
+    for mode in SEARCH_MODES:
+        if mode in INDEXED_MODES and "TEXT" not in dataset.df.columns:
+            continue
+        if mode in INDEXED_MODES and not text_indexed:
+            out.append(skipped(corpus, rows, "search", mode, reason))
+            continue
+        queries = dist.queries(mode, n_queries, rng)
+        out.append(measure(corpus, rows, "search", mode,
+                           lambda q, mode=mode: search_years(dataset, mode, q), queries))
+    return out
+
+
+def bench_filenames(corpus: str, dataset: Dataset) -> list[dict]:
+    df = dataset.df
+    names = df["Filename"].tolist()[:100_000] if "Filename" in df.columns else []
+    if not names:
+        return []
+    return [measure(corpus, len(df), "filenames", "filename_variants", filename_variants, names)]
+
+
+def run_corpus(corpus, dataset, csv_path, dist, args, rng) -> list[dict]:
+    df = dataset.df
+    has_text = "TEXT" in df.columns
+    postings = int(df["TEXT"].str.len().sum() // 6) if has_text else 0  # ~6 chars per token
+    text_indexed = has_text and postings <= args.max_postings
+    reason = f"~{postings:,} token occurrences exceed --max-postings {args.max_postings:,}"
+
+    results = bench_load(corpus, dataset, csv_path)
+    results += bench_indexes(corpus, dataset, text_indexed, reason, memory=not args.no_index_memory)
+    results += bench_search(corpus, dataset, dist, args.queries, rng, text_indexed, reason)
+    results += bench_filenames(corpus, dataset)
+    return results
+
+
+# ---------------------------
+# Reporting
+# ---------------------------
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def metadata(args) -> dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "pyarrow": columnar.pa.__version__ if columnar.pa is not None else None,
+        "seed": SEED,
+        "sizes": args.sizes,
+        "queries": args.queries,
+    }
+
+
+def print_result(r: dict) -> None:
+    label = f"{r['corpus']:<16} {r['bench']:<9} {r['case']:<20}"
+    if "skipped" in r:
+        print(f"{label} SKIPPED: {r['skipped']}", flush=True)
+        return
+    peak = f"{r['peak_mb']:9.1f} MB" if r.get("peak_mb") is not None else " " * 12
+    print(f"{label} {r['throughput_per_s'] or 0:11.1f}/s  p50 {r['p50_ms']:9.3f} ms  "
+          f"p99 {r['p99_ms']:9.3f} ms {peak}", flush=True)
+
+
+def compare(old_path: str, results: list[dict]) -> None:
+    with open(old_path, encoding="utf-8") as f:
+        old = {(r["corpus"], r["bench"], r["case"]): r for r in json.load(f)["results"] if "p50_ms" in r}
+    print(f"\np50 vs {old_path} (<1.0 is faster now)")
+    for r in results:
+        prev = old.get((r["corpus"], r["bench"], r["case"]))
+        if prev and "p50_ms" in r and prev["p50_ms"]:
+            print(f"{r['corpus']:<16} {r['bench']:<9} {r['case']:<20} {r['p50_ms'] / prev['p50_ms']:6.2f}x")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",") if x],
+                        default=list(DEFAULT_SIZES), help="synthetic corpus sizes, comma-separated")
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES, help="queries per search mode")
+    parser.add_argument("--max-postings", type=int, default=DEFAULT_MAX_POSTINGS,
+                        help="skip TEXT indexes for corpora with more token occurrences than this")
+    parser.add_argument("--no-index-memory", action="store_true",
+                        help="skip the traced rebuild that measures index peak memory")
+    parser.add_argument("--no-shipped", action="store_true", help="only run the synthetic corpora")
+    parser.add_argument("--out", help="JSON output path (default bench/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier JSON result to compare p50 latencies against")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(SEED)
+    shipped = shipped_corpora()
+    dist = Distribution([ds.df for _, ds in shipped])
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix="app4u-bench-") as tmpdir:
+        if not args.no_shipped:
+            for corpus, dataset in shipped:
+                # Copied so the columnar benchmark never writes next to the real CSV
+                csv_path = shutil.copy(dataset.source, os.path.join(tmpdir, f"{corpus}.csv"))
+                for r in run_corpus(corpus, dataset, csv_path, dist, args, rng):
+                    print_result(r)
+                    results.append(r)
+
+        for n in args.sizes:
+            t0 = time.perf_counter()
+            dataset = synthetic_dataset(n, dist.corpus(n, rng))
+            csv_path = os.path.join(tmpdir, f"{dataset.name}.csv")
+            dataset.df.to_csv(csv_path, index=False)
+            print(f"# {dataset.name}: generated in {time.perf_counter() - t0:.1f} s, "
+                  f"{os.path.getsize(csv_path) / 2**20:.1f} MB CSV", flush=True)
+            for r in run_corpus(dataset.name, dataset, csv_path, dist, args, rng):
+                print_result(r)
+                results.append(r)
+            del dataset
+            os.remove(csv_path)
+            clear_cache()  # drop the corpus' indexes before the next size
+
+    meta = metadata(args)
+    meta["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    out_path = args.out or os.path.join(OUT_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"\nmax RSS {meta['max_rss_mb']} MB; results written to {out_path}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+    missing = [r for r in results if "skipped" in r]
+    if missing:
+        print(f"\nFAILED: {len(missing)} benchmark(s) skipped", file=sys.stderr)
+        for r in missing:
+            print(f"  {r['corpus']} {r['bench']} {r['case']}: {r['skipped']}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""BM25 ranking over the TEXT column of a TCE dataset.
+
+The index is stored in CSR form (one sorted slice of doc ids / term counts
+per vocabulary term) so it can be written to a single ``.npz`` file next to
+the CSV and memory-loaded on restart instead of being rebuilt.
+
+"Words containing" keeps the old substring semantics: a row matches when
+its text contains the query as typed (case-insensitive), so "tion" finds
+"distribution" and "word stress" only matches that phrase. The index narrows
+the rows down first: each query word selects the vocabulary words that
+contain it, and only rows holding one of those for every query word are
+checked against the text. Results are ordered by BM25 score, where a query
+word counts with its best-scoring vocabulary match (not the sum over all of
+them, which would inflate short fragments).
+"""
+import heapq
+import os
+import re
+from bisect import bisect_right
+
+import numpy as np
+import pandas as pd
+
+from utils.datasets import Dataset, derived, local_artifact_path
+
+K1 = 1.5
+B = 0.75
+INDEX_SUFFIX = ".bm25.npz"
+FORMAT_VERSION = 1
+
+_TOKEN_RE = re.compile(r"\w+(?:['-]\w+)*")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def term_doc_pairs(texts, chunk: int = 10_000):
+    """Tokenize `texts` into (terms, term_ids, doc_ids, counts, doc_lengths).
+
+    `terms` is the sorted vocabulary; the (term id, doc id) pairs are unique
+    and sorted by term, then doc, with `counts` holding each term's count in
+    that doc. Tokens are mapped to ids and de-duplicated with NumPy one chunk
+    of documents at a time, so no per-token Python objects outlive a chunk.
+    """
+    vocab: dict[str, int] = {}
+    keys, counts, lengths = [], [], []
+    tokens, sizes = [], []
+
+    def flush(first_doc: int) -> None:
+        codes, uniques = pd.factorize(np.asarray(tokens, dtype=object))
+        local = np.fromiter((vocab.setdefault(t, len(vocab)) for t in uniques), dtype=np.int64, count=len(uniques))
+        ids = local[codes]
+        docs = np.repeat(np.arange(first_doc, first_doc + len(sizes), dtype=np.int64), sizes)
+        key, n = np.unique((ids << 32) | docs, return_counts=True)
+        keys.append(key)
+        counts.append(n.astype(np.int32))
+        tokens.clear()
+        sizes.clear()
+
+    first = 0
+    for doc, text in enumerate(texts):
+        toks = tokenize(text)
+        tokens.extend(toks)
+        sizes.append(len(toks))
+        lengths.append(len(toks))
+        if len(sizes) == chunk:
+            flush(first)
+            first = doc + 1
+    if sizes:
+        flush(first)
+
+    terms = sorted(vocab)
+    rank = np.empty(len(vocab), dtype=np.int64)
+    rank[[vocab[t] for t in terms]] = np.arange(len(terms))
+    key = np.concatenate(keys) if keys else np.zeros(0, dtype=np.int64)
+    count = np.concatenate(counts) if counts else np.zeros(0, dtype=np.int32)
+    del keys, counts
+    key = (rank[key >> 32] << 32) | (key & 0xFFFFFFFF)
+    order = np.argsort(key, kind="stable")
+    key, count = key[order], count[order]
+    return (terms, (key >> 32).astype(np.int32), (key & 0xFFFFFFFF).astype(np.int32), count,
+            np.asarray(lengths, dtype=np.int32))
+
+
+class BM25Index:
+    def __init__(self, terms, offsets, doc_ids, tfs, doc_len):
+        self.terms = [str(t) for t in terms]
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_len = doc_len
+        self.n_docs = len(doc_len)
+        avg = float(doc_len.mean()) if self.n_docs else 0.0
+        # Per-document BM25 length normalization, computed once
+        self._norm = K1 * (1 - B + B * doc_len / avg) if avg else np.ones(self.n_docs)
+        df = np.diff(offsets)
+        self.idf = np.log1p((self.n_docs - df + 0.5) / (df + 0.5))
+        # All terms in one string, for substring lookups over the vocabulary
+        self._joined = "\n".join(self.terms)
+        self._starts = np.cumsum([0] + [len(t) + 1 for t in self.terms[:-1]]).tolist() if self.terms else []
+
+    @classmethod
+    def build(cls, texts) -> "BM25Index":
+        terms, term_ids, doc_ids, tfs, lengths = term_doc_pairs(texts)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(terms)), out=offsets[1:])
+        return cls(terms, offsets, doc_ids, tfs.astype(np.float32), lengths.astype(np.float32))
+
+    # ---------------------------
+    # Persistence
+    # ---------------------------
+    def save(self, path: str, version: str) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f, terms=np.asarray(self.terms, dtype=str), offsets=self.offsets,
+                doc_ids=self.doc_ids, tfs=self.tfs, doc_len=self.doc_len,
+                version=np.asarray(f"{FORMAT_VERSION}:{version}"),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, version: str) -> "BM25Index | None":
+        """Load a saved index, or None if it is missing or built from other data."""
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                if str(z["version"]) != f"{FORMAT_VERSION}:{version}":
+                    return None
+                return cls(z["terms"], z["offsets"], z["doc_ids"], z["tfs"], z["doc_len"])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    # ---------------------------
+    # Querying
+    # ---------------------------
+    def _containing(self, word: str) -> list[int]:
+        """Ids of the vocabulary terms that contain `word`."""
+        tids, pos = [], self._joined.find(word)
+        while pos != -1:
+            tid = bisect_right(self._starts, pos) - 1
+            tids.append(tid)
+            # Continue after this term; one hit per term is enough
+            pos = self._joined.find(word, self._starts[tid] + len(self.terms[tid]) + 1)
+        return tids
+
+    def candidates(self, query: str) -> tuple[np.ndarray | None, np.ndarray]:
+        """Rows that may contain `query` and their BM25 scores.
+
+        Returns (rows, scores); rows is None when the query has no word
+        characters, i.e. every row is a candidate. Scores are indexed by row.
+        """
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return None, scores
+
+        hits = np.zeros(self.n_docs, dtype=np.int16)
+        for word in words:
+            best = np.zeros(self.n_docs, dtype=np.float32)
+            seen = np.zeros(self.n_docs, dtype=bool)
+            for tid in self._containing(word):
+                lo, hi = self.offsets[tid], self.offsets[tid + 1]
+                docs, tf = self.doc_ids[lo:hi], self.tfs[lo:hi]
+                best[docs] = np.maximum(best[docs], self.idf[tid] * tf * (K1 + 1) / (tf + self._norm[docs]))
+                seen[docs] = True
+            scores += best
+            hits += seen
+        return np.flatnonzero(hits == len(words)), scores
+
+    def search(self, query: str, k: int | None = None, texts=None) -> list[tuple[int, float]]:
+        """Return (row, score) pairs for rows containing `query`, best first.
+
+        `texts` are the lowercased row texts the candidates are verified
+        against; without them every candidate is returned. `k=None` returns
+        every match.
+        """
+        query = (query or "").strip().lower()
+        if not query or not self.n_docs:
+            return []
+        rows, scores = self.candidates(query)
+        if rows is None:
+            rows = np.arange(self.n_docs)
+        if texts is not None and len(rows):
+            found = [query in t for t in texts[rows].tolist()]
+            rows = rows[np.asarray(found, dtype=bool)]
+        if k is None:
+            order = rows[np.argsort(-scores[rows], kind="stable")]
+            return [(int(d), float(scores[d])) for d in order]
+        best = heapq.nlargest(k, rows.tolist(), key=scores.__getitem__)
+        return [(d, float(scores[d])) for d in best]
+
+
+# ---------------------------
+# Shared, per dataset version
+# ---------------------------
+def _build(dataset: Dataset) -> BM25Index:
+    path = local_artifact_path(dataset, INDEX_SUFFIX)
+    if path:
+        index = BM25Index.load(path, dataset.version)
+        if index is not None:
+            return index
+
+    df = dataset.df
+    index = BM25Index.build(df["TEXT"] if "TEXT" in df.columns else [])
+    if path:
+        try:
+            index.save(path, dataset.version)
+        except OSError:
+            pass  # read-only deploy: keep the in-memory index
+    return index
+
+
+def get_bm25_index(dataset: Dataset) -> BM25Index:
+    """Load (or build and persist) the BM25 index for this dataset version."""
+    return derived(dataset, "bm25", _build)
+
+
+def _lower_texts(dataset: Dataset) -> np.ndarray:
+    df = dataset.df
+    return df["TEXT"].str.lower().to_numpy(dtype=object) if "TEXT" in df.columns else np.array([], dtype=object)
+
+
+def search_text(dataset: Dataset, query: str, k: int | None = None) -> list[tuple[int, float]]:
+    """Rows whose TEXT contains `query` (case-insensitive), best BM25 score first."""
+    return get_bm25_index(dataset).search(query, k=k, texts=derived(dataset, "text_lower", _lower_texts))
@@ -0,0 +1,116 @@
+"""Columnar copies of the TExam datasets (Arrow IPC files, memory-mapped on load).
+
+Each TExam CSV gets an uncompressed ``<name>.arrow`` file next to it with
+YEAR dictionary-encoded (a pandas categorical), the comma-separated keywords
+pre-split into a ``KEYWORD_LIST`` list column, and TEXT stored once as an
+Arrow string column. Loading memory-maps the file, so string data is not
+copied into each process and several Streamlit workers share the same pages
+through the OS page cache. Arrow IPC rather than Parquet because only IPC
+files can be mapped without decoding.
+
+pyarrow ships with Streamlit; without it the loader simply keeps parsing CSV.
+Build (or refresh) the files with
+
+    python -m utils.columnar
+"""
+import os
+import sys
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # optional: fall back to CSV parsing
+    pa = None
+
+# Datasets stored columnar (the flashcard terms are tiny and stay CSV)
+COLUMNAR_DATASETS = ("Phonology", "Syntax", "Semantics", "Grammar")
+SUFFIX = ".arrow"
+VERSION_KEY = b"app4u_version"
+FORMAT_VERSION = "1"
+
+
+def columnar_path(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + SUFFIX
+
+
+def _stamp(version: str) -> bytes:
+    return f"{FORMAT_VERSION}:{version}".encode()
+
+
+def to_table(df: pd.DataFrame, version: str, split_keywords) -> "pa.Table":
+    columns, names = [], []
+    for col in df.columns:
+        values = df[col]
+        if col == "YEAR":
+            arr = pa.array(values.astype(str).tolist(), type=pa.string()).dictionary_encode()
+        elif values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+            arr = pa.array(values.astype(str).tolist(), type=pa.string())
+        else:
+            arr = pa.array(values)
+        columns.append(arr)
+        names.append(col)
+    if "KEYWORDS" in df.columns:
+        columns.append(pa.array([split_keywords(k) for k in df["KEYWORDS"]], type=pa.list_(pa.string())))
+        names.append("KEYWORD_LIST")
+    table = pa.table(columns, names=names)
+    return table.replace_schema_metadata({VERSION_KEY: _stamp(version)})
+
+
+def write_columnar(path: str, table: "pa.Table") -> None:
+    tmp = path + ".tmp"
+    with pa.OSFile(tmp, "wb") as f:
+        with ipc.new_file(f, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def read_columnar(csv_path: str, version: str) -> pd.DataFrame | None:
+    """Memory-map the columnar copy of `csv_path`, or None if missing or stale."""
+    if pa is None:
+        return None
+    path = columnar_path(csv_path)
+    try:
+        table = ipc.open_file(pa.memory_map(path, "r")).read_all()
+    except (OSError, pa.ArrowInvalid):
+        return None
+    if (table.schema.metadata or {}).get(VERSION_KEY) != _stamp(version):
+        return None
+    # Arrow-backed string columns wrap the mapped buffers instead of copying
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+
+
+def build_columnar() -> list[tuple[str, str, bool]]:
+    """Write missing or stale .arrow files; returns (name, path, rebuilt)."""
+    from utils.datasets import load_dataset
+    from utils.keyword_index import split_keywords
+
+    out = []
+    for name in COLUMNAR_DATASETS:
+        dataset = load_dataset(name)
+        if not os.path.isfile(dataset.source):
+            continue  # remote-only dataset: nothing to store next to
+        path = columnar_path(dataset.source)
+        fresh = read_columnar(dataset.source, dataset.version) is not None
+        if not fresh:
+            try:
+                write_columnar(path, to_table(dataset.df, dataset.version, split_keywords))
+            except OSError:
+                continue  # read-only deploy: keep serving the parsed CSV
+        out.append((name, path, not fresh))
+    return out
+
+
+def main() -> int:
+    if pa is None:
+        print("pyarrow is not installed; datasets will keep loading from CSV.")
+        return 1
+    for name, path, rebuilt in build_columnar():
+        state = "written" if rebuilt else "up to date"
+        print(f"{name:<10} {os.path.getsize(path) / 1024:7.0f} KB  {state}  {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
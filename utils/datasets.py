@@ -0,0 +1,206 @@
+"""Local-first loading of the CSV datasets used by the TCE search and flashcard pages.
+
+Each dataset is resolved to the copy shipped in the repo (``data/`` first, then
+``pages/data/``) and only falls back to raw.githubusercontent.com when no local
+copy exists. One parsed DataFrame is kept per process and is only re-parsed
+when the file on disk actually changes (mtime/size first, then content hash).
+When an up-to-date columnar copy exists (see utils/columnar.py) it is
+memory-mapped instead of parsing the CSV.
+"""
+import fnmatch
+import hashlib
+import os
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass
+from io import BytesIO
+
+import pandas as pd
+
+from utils import columnar, metrics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_BASE_URL = "https://raw.githubusercontent.com/MK316/APP4U/main/"
+
+# Folders searched for a local copy, in priority order (relative to ROOT)
+SEARCH_DIRS = ("data", os.path.join("pages", "data"))
+
+# Dataset name -> file name (a glob pattern picks the newest matching file)
+DATASETS = {
+    "Phonology": "TExam_new*.csv",
+    "Syntax": "TExam_syntax.csv",
+    "Semantics": "TExam_semantics.csv",
+    "Grammar": "TExam_grammar.csv",
+    "Terminology": "phon_terminology.csv",
+}
+
+# Used only when no local copy can be found
+REMOTE_PATHS = {
+    "Phonology": "pages/data/TExam_new20251122.csv",
+    "Syntax": "pages/data/TExam_syntax.csv",
+    "Semantics": "pages/data/TExam_semantics.csv",
+    "Grammar": "pages/data/TExam_grammar.csv",
+    "Terminology": "data/phon_terminology.csv",
+}
+
+TEXT_COLUMNS = ("YEAR", "KEYWORDS", "TEXT", "Filename")
+
+# Rows missing any of these columns are dropped at load time
+REQUIRED_COLUMNS = {
+    "Terminology": ("Terminology", "Description"),
+}
+
+REMOTE_TTL = 3600  # seconds, same as the old st.cache_data ttl
+
+
+@dataclass(frozen=True)
+class Dataset:
+    name: str
+    df: pd.DataFrame
+    source: str   # local path or URL the data came from
+    version: str  # content hash; changes whenever the data changes
+
+
+_cache: dict[str, Dataset] = {}
+_stamps: dict[str, tuple] = {}
+_derived: dict[tuple[str, str], tuple[str, object]] = {}
+# One lock per dataset so different datasets can load in parallel
+_locks = {name: threading.Lock() for name in DATASETS}
+_derived_locks: dict[tuple[str, str], threading.Lock] = {}
+
+
+# ---------------------------
+# Resolution
+# ---------------------------
+def resolve_path(name: str) -> str | None:
+    """Return the local file backing `name`, or None if it only exists remotely."""
+    pattern = DATASETS[name]
+    best = None
+    for folder in SEARCH_DIRS:
+        full_dir = os.path.join(ROOT, folder)
+        if not os.path.isdir(full_dir):
+            continue
+        matches = sorted(fn for fn in os.listdir(full_dir) if fnmatch.fnmatch(fn, pattern))
+        if not matches:
+            continue
+        # Date-stamped names sort chronologically; earlier folders win ties
+        if best is None or matches[-1] > os.path.basename(best):
+            best = os.path.join(full_dir, matches[-1])
+    return best
+
+
+def remote_url(name: str) -> str:
+    return RAW_BASE_URL + REMOTE_PATHS[name]
+
+
+def _fetch(url: str) -> bytes:
+    req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+    with metrics.timed("dataset fetch"), urllib.request.urlopen(req) as resp:
+        data = resp.read()
+    metrics.count("bytes fetched: datasets", len(data))
+    return data
+
+
+# ---------------------------
+# Parsing
+# ---------------------------
+def _parse(name: str, raw: bytes) -> pd.DataFrame:
+    with metrics.timed("csv parse"):
+        df = pd.read_csv(BytesIO(raw), encoding="utf-8-sig")
+    required = REQUIRED_COLUMNS.get(name)
+    if required:
+        df = df.dropna(subset=list(required)).reset_index(drop=True)
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].fillna("").astype(str)
+    return df
+
+
+# ---------------------------
+# Public API
+# ---------------------------
+def load_dataset(name: str) -> Dataset:
+    """Return the parsed dataset, re-reading it only if its source changed."""
+    if name not in DATASETS:
+        raise KeyError(f"Unknown dataset: {name}")
+
+    path = resolve_path(name)
+    with _locks[name]:
+        cached = _cache.get(name)
+
+        if path is None:
+            url = remote_url(name)
+            stamp = (url, int(time.time() // REMOTE_TTL))
+            if cached is not None and _stamps.get(name) == stamp:
+                metrics.count("dataset cache hits")
+                return cached
+            raw = _fetch(url)
+            source = url
+        else:
+            info = os.stat(path)
+            stamp = (path, info.st_mtime_ns, info.st_size)
+            if cached is not None and _stamps.get(name) == stamp:
+                metrics.count("dataset cache hits")
+                return cached
+            with open(path, "rb") as f:
+                raw = f.read()
+            source = path
+
+        metrics.count("dataset cache misses")
+        version = hashlib.sha1(raw).hexdigest()[:16]
+        _stamps[name] = stamp
+        if cached is not None and cached.version == version:
+            # Touched but unchanged (e.g. git checkout): keep the parsed frame
+            return cached
+
+        df = None
+        if path is not None and name in columnar.COLUMNAR_DATASETS:
+            # Memory-mapped Arrow copy, if it was built from this exact CSV
+            with metrics.timed("columnar read"):
+                df = columnar.read_columnar(path, version)
+        if df is None:
+            df = _parse(name, raw)
+
+        dataset = Dataset(name=name, df=df, source=source, version=version)
+        _cache[name] = dataset
+        return dataset
+
+
+def load_df(name: str) -> pd.DataFrame:
+    return load_dataset(name).df
+
+
+def derived(dataset: Dataset, kind: str, build):
+    """Return build(dataset), computed once per dataset version and shared across sessions."""
+    key = (kind, dataset.name)
+    hit = _derived.get(key)
+    if hit is not None and hit[0] == dataset.version:
+        return hit[1]
+    with _derived_locks.setdefault(key, threading.Lock()):
+        hit = _derived.get(key)
+        if hit is not None and hit[0] == dataset.version:
+            return hit[1]
+        value = build(dataset)
+        _derived[key] = (dataset.version, value)
+        return value
+
+
+def local_artifact_path(dataset: Dataset, suffix: str) -> str | None:
+    """Path for a file derived from `dataset`, stored next to its CSV (None if remote)."""
+    if not os.path.isfile(dataset.source):
+        return None
+    return os.path.splitext(dataset.source)[0] + suffix
+
+
+def forget_dataset(name: str) -> None:
+    """Drop the parsed frame for `name` so the next load re-reads it (derived indexes are kept)."""
+    with _locks[name]:
+        _cache.pop(name, None)
+        _stamps.pop(name, None)
+
+
+def clear_cache() -> None:
+    _cache.clear()
+    _stamps.clear()
+    _derived.clear()
@@ -0,0 +1,133 @@
+"""Hidden diagnostics view: rerun latency per page, slow spans, cache hit ratios
+and the profiler traces written in profiling mode (utils/profiling.py).
+
+Not a sidebar page: HOME.py renders it instead of the home page when opened
+as ``/?diagnostics=<key>``, where the key must match APP4U_DIAGNOSTICS_KEY.
+The view stays closed while that variable is unset.
+"""
+import hmac
+import os
+
+import pandas as pd
+import streamlit as st
+
+from utils import metrics, profiling
+from utils.image_cache import get_image_cache
+from utils.query_cache import query_cache
+from utils.warmup import warmup_status
+
+QUERY_PARAM = "diagnostics"
+MB = 1024 * 1024
+
+
+def requested() -> bool:
+    return QUERY_PARAM in st.query_params
+
+
+def allowed() -> bool:
+    key = os.environ.get("APP4U_DIAGNOSTICS_KEY")
+    if not key:
+        return False
+    # Bytes, not str: compare_digest rejects non-ASCII strings such as ?diagnostics=키
+    return hmac.compare_digest(st.query_params.get(QUERY_PARAM, "").encode("utf-8"), key.encode("utf-8"))
+
+
+def _ratio(hits: int, total: int) -> str:
+    return f"{hits / total:.1%}" if total else "–"
+
+
+def pages_table(snap: dict) -> pd.DataFrame:
+    rows = [{"Page": page, **s} for page, s in snap["pages"].items()]
+    df = pd.DataFrame(rows, columns=["Page", "count", "p50_ms", "p95_ms", "p99_ms", "max_ms", "total_s"])
+    return df.sort_values("p95_ms", ascending=False).round(1)
+
+
+def spans_table(snap: dict) -> pd.DataFrame:
+    rows = [{"Page": page, "Span": name, **s} for (page, name), s in snap["spans"].items()]
+    df = pd.DataFrame(rows, columns=["Page", "Span", "count", "p50_ms", "p95_ms", "p99_ms", "max_ms", "total_s"])
+    return df.sort_values("total_s", ascending=False).round(2)
+
+
+def cache_table(counters: dict) -> pd.DataFrame:
+    images = get_image_cache().usage()
+    queries = query_cache.stats()
+    image_lookups = images["memory_hits"] + images["disk_hits"] + images["misses"]
+    dataset_lookups = counters.get("dataset cache hits", 0) + counters.get("dataset cache misses", 0)
+    return pd.DataFrame([
+        {"Cache": "Images (memory + disk)", "Lookups": image_lookups,
+         "Hit ratio": _ratio(images["memory_hits"] + images["disk_hits"], image_lookups),
+         "Size": f"{images['memory_bytes'] / MB:.1f} MB memory, {images['disk_bytes'] / MB:.1f} MB disk",
+         "Evictions": images["memory_evictions"] + images["disk_evictions"]},
+        {"Cache": "Search results", "Lookups": queries["hits"] + queries["misses"],
+         "Hit ratio": _ratio(queries["hits"], queries["hits"] + queries["misses"]),
+         "Size": f"{queries['entries']} / {queries['max_entries']} entries",
+         "Evictions": queries["evictions"] + queries["invalidations"]},
+        {"Cache": "Datasets", "Lookups": dataset_lookups,
+         "Hit ratio": _ratio(counters.get("dataset cache hits", 0), dataset_lookups),
+         "Size": "", "Evictions": 0},
+    ])
+
+
+def render_profiles() -> None:
+    st.subheader("Profiles")
+    traces = profiling.list_traces()
+    if not traces:
+        st.info("No traces yet. Open a page with ?profile=1 (or set APP4U_PROFILE=1) to record some.")
+        return
+    if profiling.skipped:
+        st.warning(f"{profiling.skipped} reruns were not profiled because another rerun was being "
+                   "profiled at the time (one profiler runs per process).")
+    name = st.selectbox(f"Trace ({len(traces)} kept, newest first)", traces, key="diag_trace")
+    limit = st.slider("Functions", 10, 100, 30, step=10, key="diag_trace_limit")
+    try:
+        rows = profiling.top_functions(name, limit)
+    except (OSError, EOFError, ValueError) as e:  # trimmed or half-written meanwhile
+        st.error(f"Could not read {name}: {e}")
+        return
+    st.dataframe(pd.DataFrame(rows), width="stretch", hide_index=True)
+
+
+def render_diagnostics() -> None:
+    st.title("🩺 Diagnostics")
+    if not os.environ.get("APP4U_DIAGNOSTICS_KEY"):
+        st.error("Diagnostics are disabled: set APP4U_DIAGNOSTICS_KEY on the server to enable them.")
+        return
+    if not allowed():
+        st.error("Not authorized.")
+        return
+
+    snap = metrics.snapshot()
+    counters = snap["counters"]
+    st.caption(f"Rolling percentiles over the last {metrics.WINDOW} samples per series, since the server started.")
+
+    st.subheader("Slowest pages (per rerun)")
+    if snap["pages"]:
+        st.dataframe(pages_table(snap), width="stretch", hide_index=True)
+    else:
+        st.info("No page reruns recorded yet.")
+
+    st.subheader("Caches")
+    st.dataframe(cache_table(counters), width="stretch", hide_index=True)
+
+    st.subheader("Bytes fetched")
+    fetched = {name.split(": ", 1)[1]: n for name, n in counters.items() if name.startswith("bytes fetched: ")}
+    fetched["image cache loads (network + local files)"] = get_image_cache().usage()["bytes_fetched"]
+    st.dataframe(
+        pd.DataFrame([{"Source": k, "MB": round(v / MB, 2)} for k, v in fetched.items()]),
+        width="stretch", hide_index=True,
+    )
+
+    st.subheader("Time by span")
+    if snap["spans"]:
+        st.dataframe(spans_table(snap), width="stretch", hide_index=True)
+    else:
+        st.info("No spans recorded yet.")
+
+    render_profiles()
+
+    with st.expander("Warm-up"):
+        st.json(warmup_status())
+
+    if st.button("Reset counters"):
+        metrics.reset()
+        st.rerun()
@@ -0,0 +1,45 @@
+"""Consonant feature matrix (feature rows x segment columns) for the feature matrix page.
+
+The matrix is built once per process. Cell styles come from whole-array masks
+(plus cells, the highlighted row, the highlighted column) rather than a
+per-cell Python callback. The Styler handed to st.dataframe is memoized per
+(row, column) selection, so a rerun does not rebuild it and the page keeps
+the interactive table (sorting, scrolling, column resizing).
+"""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from pandas.io.formats.style import Styler
+
+from utils.phonemes import FEATURES, matrix_features
+
+IPA_FEATURES = matrix_features()  # segment -> feature -> '+' / '-'
+
+PLUS_CSS = "background-color: yellow; color: black"
+HIGHLIGHT_CSS = "background-color: lightblue"
+
+
+@lru_cache(maxsize=1)
+def feature_matrix() -> pd.DataFrame:
+    """Features as rows, segments as columns ('+' / '-' values)."""
+    return pd.DataFrame(IPA_FEATURES).reindex(list(FEATURES))
+
+
+@lru_cache(maxsize=1)
+def _plus_mask() -> np.ndarray:
+    return feature_matrix().to_numpy() == "+"
+
+
+def cell_styles(selected_row: str = "", selected_col: str = "") -> np.ndarray:
+    """CSS for every cell: '+' cells yellow, else the selected row/column light blue."""
+    df = feature_matrix()
+    highlight = (df.index.to_numpy() == selected_row)[:, None] | (df.columns.to_numpy() == selected_col)[None, :]
+    return np.where(_plus_mask(), PLUS_CSS, np.where(highlight, HIGHLIGHT_CSS, ""))
+
+
+@lru_cache(maxsize=1024)
+def styled_matrix(selected_row: str = "", selected_col: str = "") -> Styler:
+    """Styler for one (row, column) selection ("" = none), for st.dataframe."""
+    styles = cell_styles(selected_row, selected_col)
+    return feature_matrix().style.apply(lambda _: styles, axis=None)
@@ -0,0 +1,182 @@
+"""Browser-side flashcard deck (a Streamlit v2 bidirectional component).
+
+The whole deck is sent once as the component's data. Flipping, self-grading
+and moving to the next card all happen in the browser, so a deck costs no
+script reruns until it reports back. Grades come back to Python as one
+`results` trigger when the last card is done. If the tab is hidden midway,
+any grades not yet sent go back early so they are not lost. Progress is
+kept in sessionStorage under the deck's token, so a remount (or a rerun from
+another widget) resumes where the student was.
+
+    result = flashcard_deck(cards, token, key="deck")
+    if result.results:  # {"deck": token, "results": [[index, correct], ...], "done": bool}
+        ...
+"""
+import streamlit as st
+
+FONTS_URL = (
+    "https://fonts.googleapis.com/css2?family=Playfair+Display:wght@700;800"
+    "&family=Inter:wght@400;500;600&display=swap"
+)
+
+HTML = '<div class="deck"></div>'
+
+CSS = """
+* { box-sizing: border-box; }
+.deck { font-family: 'Inter', sans-serif; }
+.status { font-size: 14px; color: #6b6f8f; margin-bottom: 6px; }
+.bar { height: 6px; background: #e6e6ef; border-radius: 3px; margin-bottom: 14px; overflow: hidden; }
+.bar > div { height: 100%; background: #E8A33D; transition: width 0.3s; }
+.stage { perspective: 1600px; width: 100%; height: 380px; }
+.flip-card {
+  position: relative; width: 100%; height: 100%;
+  cursor: pointer; transition: transform 0.65s cubic-bezier(.4,.2,.2,1);
+  transform-style: preserve-3d;
+}
+.flip-card.flipped { transform: rotateY(180deg); }
+.face {
+  position: absolute; inset: 0; border-radius: 20px;
+  backface-visibility: hidden; padding: 30px 34px;
+  display: flex; flex-direction: column; justify-content: center;
+  box-shadow: 0 10px 30px rgba(20,22,48,0.25);
+}
+.front { background: linear-gradient(155deg, #1B1F3B 0%, #262B52 100%); color: #F4EFE6; }
+.back {
+  background: #F4EFE6; color: #1B1F3B; transform: rotateY(180deg);
+  text-align: center; align-items: center;
+}
+.eyebrow {
+  font-size: 12px; letter-spacing: 2.5px; text-transform: uppercase;
+  color: #E8A33D; font-weight: 600; margin-bottom: 14px;
+}
+.desc { font-size: 16.5px; line-height: 1.55; margin-bottom: 16px; max-height: 190px; overflow-y: auto; padding-right: 6px; }
+.example {
+  font-size: 14.5px; line-height: 1.5; color: #C9CCE6;
+  border-top: 1px solid rgba(244,239,230,0.25); padding-top: 12px; font-style: italic;
+}
+.term { font-family: 'Playfair Display', serif; font-weight: 800; font-size: 34px; margin-bottom: 10px; line-height: 1.15; }
+.hint { font-size: 12.5px; color: #6b6f8f; letter-spacing: 1px; text-transform: uppercase; margin-top: 18px; }
+.backline { width: 46px; height: 3px; background: #E8A33D; margin-bottom: 16px; border-radius: 2px; }
+.buttons { display: flex; gap: 10px; margin-top: 18px; }
+.buttons button {
+  flex: 1; padding: 10px; font-size: 15px; border-radius: 8px; cursor: pointer;
+  border: 1px solid #d0d0dc; background: white; color: #1B1F3B;
+}
+.buttons button.primary { background: #1B1F3B; color: #F4EFE6; border-color: #1B1F3B; }
+.buttons button:disabled { opacity: 0.45; cursor: default; }
+.note { font-size: 14px; color: #6b6f8f; margin-top: 10px; min-height: 1.2em; }
+"""
+
+JS = """
+const FONTS_ID = "app4u-flashcard-fonts";
+
+export default function (component) {
+  const { data, parentElement, setTriggerValue } = component;
+  const root = parentElement.querySelector(".deck");
+  if (!data || !root) return;
+
+  if (!document.getElementById(FONTS_ID)) {  // load the fonts once per page
+    const link = document.createElement("link");
+    link.id = FONTS_ID;
+    link.rel = "stylesheet";
+    link.href = data.fonts;
+    document.head.appendChild(link);
+  }
+
+  const storeKey = "app4u-deck-" + data.token;
+  const saved = JSON.parse(sessionStorage.getItem(storeKey) || "null");
+  const s = saved || { idx: data.start, score: data.score, attempts: data.attempts, graded: false, pending: [] };
+  const save = () => sessionStorage.setItem(storeKey, JSON.stringify(s));
+  const cards = data.cards;
+
+  const send = (done) => {
+    if (!s.pending.length && !done) return;
+    setTriggerValue("results", { deck: data.token, results: s.pending, done: done });
+    s.pending = [];
+    save();
+  };
+
+  const el = (tag, cls, text) => {
+    const e = document.createElement(tag);
+    if (cls) e.className = cls;
+    if (text !== undefined) e.textContent = text;
+    return e;
+  };
+
+  const render = () => {
+    root.replaceChildren();
+    if (s.idx >= cards.length) {
+      root.appendChild(el("div", "status", "Deck finished. Saving your results…"));
+      return;
+    }
+    const card = cards[s.idx];
+    root.appendChild(el("div", "status",
+      `Card ${s.idx + 1} of ${cards.length}  ·  Score: ${s.score}/${s.attempts}`));
+    const bar = root.appendChild(el("div", "bar")).appendChild(el("div"));
+    bar.style.width = `${100 * s.idx / cards.length}%`;
+
+    const stage = root.appendChild(el("div", "stage"));
+    const flip = stage.appendChild(el("div", "flip-card"));
+    flip.onclick = () => flip.classList.toggle("flipped");
+    const front = flip.appendChild(el("div", "face front"));
+    front.appendChild(el("div", "eyebrow", `Term #${card.number} · Tap card to reveal`));
+    front.appendChild(el("div", "desc", card.description));
+    front.appendChild(el("div", "example", card.example));
+    const back = flip.appendChild(el("div", "face back"));
+    back.appendChild(el("div", "backline"));
+    back.appendChild(el("div", "term", card.term));
+    back.appendChild(el("div", "hint", "Tap again to flip back"));
+
+    const buttons = root.appendChild(el("div", "buttons"));
+    const right = buttons.appendChild(el("button", "", "✅ Got it right"));
+    const missed = buttons.appendChild(el("button", "", "❌ Missed it"));
+    const last = s.idx === cards.length - 1;
+    const next = root.appendChild(el("div", "buttons")).appendChild(
+      el("button", "primary", last ? "Finish 🏁" : "Next card ▶️"));
+    const note = root.appendChild(el("div", "note"));
+
+    const sync = () => {
+      right.disabled = missed.disabled = s.graded;
+      next.disabled = !s.graded;
+      note.textContent = s.graded ? "" : "Grade yourself (Got it right / Missed it) before moving on.";
+    };
+    const grade = (correct) => {
+      if (s.graded) return;
+      s.graded = true;
+      s.attempts += 1;
+      if (correct) s.score += 1;
+      s.pending.push([s.idx, correct]);
+      save();
+      sync();
+    };
+    right.onclick = () => grade(true);
+    missed.onclick = () => grade(false);
+    next.onclick = () => {
+      s.idx += 1;
+      s.graded = false;
+      save();
+      if (s.idx >= cards.length) send(true);
+      render();
+    };
+    sync();
+  };
+
+  const onHide = () => { if (document.visibilityState === "hidden") send(false); };
+  document.addEventListener("visibilitychange", onHide);
+  render();
+  return () => document.removeEventListener("visibilitychange", onHide);
+}
+"""
+
+_deck = st.components.v2.component("app4u_flashcard_deck", html=HTML, css=CSS, js=JS)
+
+
+def flashcard_deck(cards: list[dict], token: str, *, start: int = 0, score: int = 0,
+                   attempts: int = 0, key: str = "flashcard_deck"):
+    """Mount the deck. `cards` are {"term", "description", "example", "number"} dicts;
+    `start`/`score`/`attempts` say where the server already is for this `token`."""
+    data = {
+        "token": token, "cards": cards, "fonts": FONTS_URL,
+        "start": start, "score": score, "attempts": attempts,
+    }
+    return _deck(data=data, key=key, on_results_change=lambda: None)
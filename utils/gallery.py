@@ -0,0 +1,91 @@
+"""Paginated thumbnail gallery for search results (shared by the TCE search pages).
+
+Only the tiles on the current page are loaded, all at once on a small
+bounded thread pool, instead of one button-click/rerun/fetch per result.
+Clicking a tile's button expands it to the full image above the grid.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+import streamlit as st
+
+from utils import metrics
+
+GALLERY_WORKERS = 6
+PER_PAGE = 12
+COLUMNS = 4
+
+_pool = ThreadPoolExecutor(max_workers=GALLERY_WORKERS, thread_name_prefix="tce-gallery")
+
+
+@dataclass(frozen=True)
+class Tile:
+    title: str
+    caption: str
+    thumb: Callable[[], bytes] | None  # None when the item has no image
+    full: Callable[[], bytes] | None
+
+
+def _load(loader):
+    if loader is None:
+        return None, "No image for this item."
+    try:
+        return loader(), None
+    except Exception as e:
+        return None, str(e)
+
+
+def reset_gallery(key: str) -> None:
+    """Forget the page and expanded tile of gallery `key`; call when its results change."""
+    st.session_state.pop(f"{key}_page", None)
+    st.session_state[f"{key}_expanded"] = None
+
+
+def render_gallery(tiles: list[Tile], key: str, per_page: int = PER_PAGE, columns: int = COLUMNS):
+    if not tiles:
+        return
+
+    n_pages = (len(tiles) + per_page - 1) // per_page
+    page = 1
+    if n_pages > 1:
+        page = st.number_input(
+            f"Page (1–{n_pages})", min_value=1, max_value=n_pages, value=1, step=1, key=f"{key}_page")
+    start = (int(page) - 1) * per_page
+    visible = tiles[start:start + per_page]
+
+    # Expanded tile (full image) above the grid
+    expanded = st.session_state.get(f"{key}_expanded")
+    if expanded is not None and expanded < len(tiles):
+        tile = tiles[expanded]
+        data, err = _load(tile.full)
+        st.markdown(f"**🔍 {tile.title}** — {tile.caption}")
+        if err:
+            st.error(f"Failed to load image.\nError: {err}")
+        else:
+            st.image(data)
+        if st.button("✖ Close", key=f"{key}_close"):
+            st.session_state[f"{key}_expanded"] = None
+            st.rerun()
+
+    # Thumbnails for this page only, fetched in parallel
+    with metrics.timed("gallery thumbnails"):
+        loaded = list(_pool.map(lambda t: _load(t.thumb), visible))
+
+    for row_start in range(0, len(visible), columns):
+        cols = st.columns(columns)
+        for offset, col in enumerate(cols):
+            i = row_start + offset
+            if i >= len(visible):
+                break
+            tile = visible[i]
+            data, err = loaded[i]
+            with col:
+                if data is not None:
+                    st.image(data, width="stretch")
+                else:
+                    st.caption(err)
+                st.caption(f"**{tile.title}** · {tile.caption}")
+                if tile.full is not None and st.button("🔍 Expand", key=f"{key}_open_{start + i}"):
+                    st.session_state[f"{key}_expanded"] = start + i
+                    st.rerun()
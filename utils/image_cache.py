@@ -0,0 +1,215 @@
+"""Two-tier cache for exam images, holding encoded (PNG/JPEG) bytes only.
+
+Tier 1 is a bounded in-memory LRU; tier 2 is a content-addressed directory on
+disk with its own byte budget, evicting least recently used files first.
+Entries keyed by a manifest sha1 never go stale. Entries keyed only by URL
+carry a time bucket in their key, so they are refetched every URL_TTL
+seconds (an image re-uploaded under the same name shows up within the hour)
+and the outdated copies age out of the LRU.
+Both tiers store the compressed file bytes, never decoded bitmaps, so a
+semester of browsing cannot grow the server's memory past the budget.
+
+Configuration (environment variables):
+    APP4U_IMAGE_CACHE_DIR     disk tier location (default ~/.cache/app4u/images)
+    APP4U_IMAGE_CACHE_MB      disk tier budget in MB (default 200)
+    APP4U_IMAGE_MEMORY_MB     memory tier budget in MB (default 32)
+"""
+import hashlib
+import os
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+
+from utils import metrics
+
+MB = 1024 * 1024
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "app4u", "images")
+
+URL_TTL = 3600  # seconds an entry without a sha1 is trusted, same as the old st.cache_data ttl
+
+
+def fetch_url(url: str) -> bytes:
+    req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+    with metrics.timed("image fetch"), urllib.request.urlopen(req) as resp:
+        data = resp.read()
+    metrics.count("bytes fetched: images", len(data))
+    return data
+
+
+def read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class ImageCache:
+    def __init__(self, disk_dir: str, disk_budget: int, memory_budget: int):
+        self.disk_dir = disk_dir
+        self.disk_budget = disk_budget
+        self.memory_budget = memory_budget
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: OrderedDict[str, int] = OrderedDict()  # key -> size, LRU first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0,
+            "memory_evictions": 0, "disk_evictions": 0, "bytes_fetched": 0,
+        }
+        self._scan_disk()
+
+    # ---------------------------
+    # Disk tier
+    # ---------------------------
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key)
+
+    def _scan_disk(self) -> None:
+        """Rebuild the disk LRU from the files left by a previous run (oldest first)."""
+        if not os.path.isdir(self.disk_dir):
+            return
+        found = []
+        for sub in os.listdir(self.disk_dir):
+            sub_dir = os.path.join(self.disk_dir, sub)
+            if not os.path.isdir(sub_dir):
+                continue
+            for key in os.listdir(sub_dir):
+                try:
+                    info = os.stat(os.path.join(sub_dir, key))
+                except OSError:
+                    continue
+                found.append((info.st_mtime_ns, key, info.st_size))
+        for _, key, size in sorted(found):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        while self._disk_bytes > self.disk_budget and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.stats["disk_evictions"] += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _disk_get(self, key: str) -> bytes | None:
+        if key not in self._disk:
+            return None
+        path = self._path(key)
+        try:
+            data = read_file(path)
+            os.utime(path)  # keep LRU order across restarts
+        except OSError:
+            self._disk_bytes -= self._disk.pop(key)
+            return None
+        self._disk.move_to_end(key)
+        return data
+
+    def _disk_put(self, key: str, data: bytes) -> None:
+        if len(data) > self.disk_budget or key in self._disk:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            return  # read-only or full disk: memory tier still works
+        self._disk[key] = len(data)
+        self._disk_bytes += len(data)
+        self._evict_disk()
+
+    # ---------------------------
+    # Memory tier
+    # ---------------------------
+    def _memory_put(self, key: str, data: bytes) -> None:
+        if len(data) > self.memory_budget:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_budget:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.stats["memory_evictions"] += 1
+
+    # ---------------------------
+    # Public API
+    # ---------------------------
+    def get(self, key: str, load, persist: bool = True) -> bytes:
+        """Return the bytes for `key`, calling `load()` only on a miss in both tiers.
+
+        `persist=False` keeps the entry out of the disk tier (for files that
+        are already on local disk).
+        """
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return data
+            data = self._disk_get(key)
+            if data is not None:
+                self.stats["disk_hits"] += 1
+                self._memory_put(key, data)
+                return data
+
+        data = load()  # network / file I/O outside the lock
+        with self._lock:
+            self.stats["misses"] += 1
+            self.stats["bytes_fetched"] += len(data)
+            self._memory_put(key, data)
+            if persist:
+                self._disk_put(key, data)
+        return data
+
+    def usage(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "memory_bytes": self._memory_bytes, "memory_items": len(self._memory),
+                "disk_bytes": self._disk_bytes, "disk_items": len(self._disk),
+            }
+
+
+_cache: ImageCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ImageCache(
+                    disk_dir=os.environ.get("APP4U_IMAGE_CACHE_DIR", DEFAULT_DIR),
+                    disk_budget=int(float(os.environ.get("APP4U_IMAGE_CACHE_MB", 200)) * MB),
+                    memory_budget=int(float(os.environ.get("APP4U_IMAGE_MEMORY_MB", 32)) * MB),
+                )
+    return _cache
+
+
+def url_key(url: str, now: float | None = None) -> str:
+    """Cache key for a URL without a known sha1; changes every URL_TTL seconds."""
+    bucket = int((time.time() if now is None else now) // URL_TTL)
+    return f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}-{bucket}"
+
+
+def load_image_bytes(url: str, sha1: str | None = None, local_path: str | None = None) -> bytes:
+    """Encoded image bytes for `url`, served from the cache when possible.
+
+    `sha1` (from the image manifest) makes the entry content-addressed and
+    permanent; without it the entry expires after URL_TTL. `local_path` lets
+    images shipped in the repo skip the network entirely.
+    """
+    key = sha1 or url_key(url)
+    if local_path and os.path.isfile(local_path):
+        return get_image_cache().get(key, lambda: read_file(local_path), persist=False)
+    return get_image_cache().get(key, lambda: fetch_url(url))
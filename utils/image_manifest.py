@@ -0,0 +1,198 @@
+"""Offline manifest mapping each dataset's `Filename` values to the exact image file.
+
+The CSVs spell file names loosely (``2026_2.PNG`` for ``2026_2.jpg``, spaces
+for underscores, ...), which used to mean probing several URLs per click.
+The manifest resolves every row once at build time and records the file's
+size, pixel dimensions and content hash; rows that cannot be resolved are
+listed so they can be fixed in the CSV.
+
+Rebuild after adding images or editing a CSV:
+
+    python -m utils.image_manifest
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+
+from PIL import Image
+
+from utils.datasets import ROOT, load_dataset
+
+MANIFEST_PATH = os.path.join(ROOT, "data", "image_manifest.json")
+MANIFEST_VERSION = 1
+
+# Dataset name -> folder holding its exam scans (relative to ROOT)
+IMAGE_DIRS = {
+    "Syntax": "data/syntax",
+    "Semantics": "data/semantics",
+    "Grammar": "data/grammar",
+}
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+
+# ---------------------------
+# Filename helpers
+# ---------------------------
+def strip_path(filename: str) -> str:
+    fn = (filename or "").strip().replace("\\", "/")
+    return fn.split("/")[-1]
+
+def filename_variants(filename: str) -> list[str]:
+    fn0 = strip_path(filename)
+    if not fn0:
+        return []
+
+    variants = [fn0]
+    if " " in fn0:
+        variants.append(fn0.replace(" ", "_"))
+
+    out = []
+    for v in variants:
+        lower = v.lower()
+        if lower.endswith(".png"):
+            stem = v[:-4]
+            out.extend([stem + ".png", stem + ".PNG"])
+        elif lower.endswith(".jpg"):
+            stem = v[:-4]
+            out.extend([stem + ".jpg", stem + ".JPG"])
+        elif lower.endswith(".jpeg"):
+            stem = v[:-5]
+            out.extend([stem + ".jpeg", stem + ".JPEG"])
+        else:
+            out.extend([v + ".png", v + ".PNG"])
+
+    out.extend(variants)
+
+    seen, uniq = set(), []
+    for x in out:
+        x = x.strip()
+        if x and x not in seen:
+            seen.add(x)
+            uniq.append(x)
+
+    return uniq
+
+
+def resolve_filename(filename: str, files: list[str]) -> str | None:
+    """Pick the file in `files` that `filename` refers to, or None."""
+    present = set(files)
+    for v in filename_variants(filename):
+        if v in present:
+            return v
+
+    # Same stem, any image extension / case (e.g. CSV says .PNG, file is .jpg)
+    by_stem = {}
+    for f in files:
+        stem, ext = os.path.splitext(f)
+        if ext.lower() in IMAGE_EXTENSIONS:
+            by_stem.setdefault(stem.lower(), f)
+    for v in filename_variants(filename):
+        hit = by_stem.get(os.path.splitext(v)[0].lower())
+        if hit:
+            return hit
+    return None
+
+
+# ---------------------------
+# Build
+# ---------------------------
+def describe_image(path: str) -> dict:
+    with open(path, "rb") as f:
+        raw = f.read()
+    with Image.open(path) as im:
+        width, height = im.size
+    return {
+        "bytes": len(raw),
+        "width": width,
+        "height": height,
+        "sha1": hashlib.sha1(raw).hexdigest(),
+    }
+
+
+def build_manifest() -> dict:
+    subjects = {}
+    for name, folder in IMAGE_DIRS.items():
+        full_dir = os.path.join(ROOT, folder)
+        files = sorted(os.listdir(full_dir)) if os.path.isdir(full_dir) else []
+        dataset = load_dataset(name)
+        df = dataset.df
+
+        images, unresolved, described = {}, [], {}
+        filenames = df["Filename"].tolist() if "Filename" in df.columns else []
+        for filename in filenames:
+            if not filename or filename.lower() in {"nan", "none"} or filename in images:
+                continue
+            actual = resolve_filename(filename, files)
+            if actual is None:
+                unresolved.append(filename)
+                continue
+            if actual not in described:
+                described[actual] = describe_image(os.path.join(full_dir, actual))
+            images[filename] = {"path": f"{folder}/{actual}", **described[actual]}
+
+        subjects[name] = {
+            "dir": folder,
+            "dataset_version": dataset.version,
+            "images": images,
+            "unresolved": unresolved,
+        }
+    return {"version": MANIFEST_VERSION, "subjects": subjects}
+
+
+def write_manifest(manifest: dict, path: str = MANIFEST_PATH) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True, ensure_ascii=False)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+# ---------------------------
+# Lookup (used by the pages)
+# ---------------------------
+_loaded: tuple[int, dict] | None = None
+_lock = threading.Lock()
+
+
+def load_manifest() -> dict:
+    """The manifest on disk, re-read only when the file changes ({} if missing)."""
+    global _loaded
+    try:
+        mtime = os.stat(MANIFEST_PATH).st_mtime_ns
+    except OSError:
+        return {}
+    if _loaded is not None and _loaded[0] == mtime:
+        return _loaded[1]
+    with _lock:
+        if _loaded is None or _loaded[0] != mtime:
+            with open(MANIFEST_PATH, encoding="utf-8") as f:
+                _loaded = (mtime, json.load(f))
+        return _loaded[1]
+
+
+def lookup_image(subject: str, filename: str) -> dict | None:
+    """Manifest entry ({"path", "bytes", "width", "height", "sha1"}) or None."""
+    entry = load_manifest().get("subjects", {}).get(subject)
+    if entry is None:
+        return None
+    return entry["images"].get(filename)
+
+
+def main() -> int:
+    manifest = build_manifest()
+    write_manifest(manifest)
+    missing = 0
+    for name, entry in manifest["subjects"].items():
+        print(f"{name}: {len(entry['images'])} images resolved")
+        for filename in entry["unresolved"]:
+            print(f"  UNRESOLVED {filename} (no matching file in {entry['dir']})")
+            missing += 1
+    print(f"Wrote {os.path.relpath(MANIFEST_PATH, ROOT)}")
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""Display-size derivatives (thumbnail / screen / original) of the exam scans.
+
+Derivatives are WebP files named after the source's content hash, stored in
+``data/.derived/`` (not committed), so an image is only re-encoded when its
+content changes. Build them all ahead of time with
+
+    python -m utils.image_variants
+
+or let `local_variant` create a missing one on first request. Images that
+only exist remotely (the Phonology scans on Hugging Face) are resized on
+first fetch and kept in the image cache's disk tier instead.
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+from io import BytesIO
+
+from PIL import Image
+
+from utils import metrics
+from utils.datasets import ROOT
+from utils.image_cache import get_image_cache, load_image_bytes, read_file, url_key
+
+# Size name -> maximum width in pixels ("original" serves the source file as is)
+VARIANTS = {"thumb": 320, "screen": 800}
+SIZES = ("thumb", "screen", "original")
+WEBP_QUALITY = 80
+
+DATA_DIR = os.path.join(ROOT, "data")
+DERIVED_DIR = os.path.join(DATA_DIR, ".derived")
+INDEX_PATH = os.path.join(DERIVED_DIR, "index.json")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+_index_lock = threading.Lock()
+
+
+# ---------------------------
+# Encoding
+# ---------------------------
+def render_variant(data: bytes, size: str) -> bytes:
+    """Downscale encoded image bytes to `size` and return them as WebP."""
+    with metrics.timed("webp encode"):
+        return _render_variant(data, size)
+
+
+def _render_variant(data: bytes, size: str) -> bytes:
+    max_width = VARIANTS[size]
+    with Image.open(BytesIO(data)) as im:
+        im.load()
+        if im.mode in ("RGBA", "LA", "P"):
+            # Scans are opaque; flatten onto white so WebP can drop the alpha plane
+            rgba = im.convert("RGBA")
+            flat = Image.new("RGB", rgba.size, "white")
+            flat.paste(rgba, mask=rgba.getchannel("A"))
+            im = flat
+        elif im.mode != "RGB":
+            im = im.convert("RGB")
+        if im.width > max_width:
+            im = im.resize((max_width, round(im.height * max_width / im.width)), Image.LANCZOS)
+        out = BytesIO()
+        im.save(out, "WEBP", quality=WEBP_QUALITY, method=4)
+    return out.getvalue()
+
+
+def variant_path(sha1: str, size: str) -> str:
+    return os.path.join(DERIVED_DIR, sha1[:2], f"{sha1}-{size}.webp")
+
+
+def file_sha1(path: str) -> str:
+    return hashlib.sha1(read_file(path)).hexdigest()
+
+
+def ensure_variant(src_path: str, sha1: str, size: str) -> str:
+    """Path of the `size` derivative of `src_path`, encoding it if missing."""
+    if size == "original":
+        return src_path
+    out = variant_path(sha1, size)
+    if not os.path.exists(out):
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        tmp = f"{out}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(render_variant(read_file(src_path), size))
+        os.replace(tmp, out)
+    return out
+
+
+# ---------------------------
+# Lookups used by the pages
+# ---------------------------
+def local_variant(src_path: str, sha1: str, size: str) -> bytes:
+    """Encoded bytes of a repo image at `size`, via the image cache."""
+    if size != "original":
+        try:
+            path = ensure_variant(src_path, sha1, size)
+            return get_image_cache().get(f"{sha1}-{size}", lambda: read_file(path), persist=False)
+        except OSError:
+            pass  # read-only checkout: fall back to the original
+    return get_image_cache().get(sha1, lambda: read_file(src_path), persist=False)
+
+
+def remote_variant(url: str, size: str) -> bytes:
+    """Encoded bytes of a remote image at `size`; the resized copy is disk-cached."""
+    if size == "original":
+        return load_image_bytes(url)
+    return get_image_cache().get(
+        f"{url_key(url)}-{size}", lambda: render_variant(load_image_bytes(url), size))
+
+
+# ---------------------------
+# Offline / incremental build
+# ---------------------------
+def _load_index() -> dict:
+    try:
+        with open(INDEX_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(index: dict) -> None:
+    os.makedirs(DERIVED_DIR, exist_ok=True)
+    tmp = INDEX_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(tmp, INDEX_PATH)
+
+
+def source_images() -> list[str]:
+    """Every exam image under data/<subject>/ (relative to ROOT)."""
+    found = []
+    for sub in sorted(os.listdir(DATA_DIR)):
+        sub_dir = os.path.join(DATA_DIR, sub)
+        if sub.startswith(".") or not os.path.isdir(sub_dir):
+            continue
+        for fn in sorted(os.listdir(sub_dir)):
+            if fn.lower().endswith(IMAGE_EXTENSIONS):
+                found.append(f"data/{sub}/{fn}")
+    return found
+
+
+def build_variants() -> dict:
+    """Create any missing derivatives; files whose content is unchanged are skipped."""
+    with _index_lock:
+        index = _load_index()
+        report = {"processed": [], "skipped": 0, "source_bytes": 0, "derived_bytes": {}}
+        for rel in source_images():
+            src = os.path.join(ROOT, rel)
+            info = os.stat(src)
+            stamp = [info.st_mtime_ns, info.st_size]
+            known = index.get(rel)
+            # Re-hash only when mtime/size moved
+            sha1 = known["sha1"] if known and known["stamp"] == stamp else file_sha1(src)
+            missing = [s for s in VARIANTS if not os.path.exists(variant_path(sha1, s))]
+            for size in missing:
+                ensure_variant(src, sha1, size)
+            if missing:
+                report["processed"].append(rel)
+            else:
+                report["skipped"] += 1
+            index[rel] = {"sha1": sha1, "stamp": stamp}
+            report["source_bytes"] += info.st_size
+            for size in VARIANTS:
+                report["derived_bytes"][size] = (
+                    report["derived_bytes"].get(size, 0) + os.path.getsize(variant_path(sha1, size)))
+        _save_index(index)
+    return report
+
+
+def main() -> int:
+    report = build_variants()
+    for rel in report["processed"]:
+        print(f"encoded {rel}")
+    print(f"{len(report['processed'])} processed, {report['skipped']} unchanged")
+    print(f"originals: {report['source_bytes'] / 1024:.0f} KB")
+    for size, n in report["derived_bytes"].items():
+        print(f"{size}: {n / 1024:.0f} KB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Inverted index over the KEYWORDS column of a TCE dataset.
+
+Each normalized keyword maps to a sorted array of row positions. A query key
+keeps the old substring semantics ("tap" finds "tapping") by resolving it
+against the (small) keyword vocabulary once, after which combining keys is
+just sorted-array union / intersection.
+
+Query syntax: commas separate alternatives (OR, as before) and ``&`` joins
+keys that must all be present, e.g. ``tapping & flap, aspiration``.
+"""
+import re
+from functools import reduce
+
+import numpy as np
+
+from utils.datasets import Dataset, derived
+
+_EMPTY = np.empty(0, dtype=np.int32)
+_MAX_MEMO = 4096
+
+
+def normalize_keyword(text: str) -> str:
+    return re.sub(r"\s+", " ", (text or "").strip().lower())
+
+
+def split_keywords(cell: str) -> list[str]:
+    return [k for k in (normalize_keyword(p) for p in (cell or "").split(",")) if k]
+
+
+def parse_query(query: str) -> list[list[str]]:
+    """'a & b, c' -> [['a', 'b'], ['c']] (OR of AND-groups)."""
+    groups = []
+    for part in (query or "").split(","):
+        keys = [k for k in (normalize_keyword(x) for x in part.split("&")) if k]
+        if keys:
+            groups.append(keys)
+    return groups
+
+
+class KeywordIndex:
+    def __init__(self, keyword_lists):
+        """`keyword_lists` yields each row's normalized keywords (see split_keywords)."""
+        postings: dict[str, list[int]] = {}
+        n = 0
+        for row, keywords in enumerate(keyword_lists):
+            for kw in keywords:
+                rows = postings.setdefault(kw, [])
+                if not rows or rows[-1] != row:
+                    rows.append(row)
+            n = row + 1
+        self.n_rows = n
+        self.postings = {kw: np.asarray(rows, dtype=np.int32) for kw, rows in postings.items()}
+        self.vocabulary = sorted(self.postings)
+        self._memo: dict[str, np.ndarray] = {}
+
+    def rows_for_key(self, key: str) -> np.ndarray:
+        """Rows whose keywords contain `key` as a substring."""
+        key = normalize_keyword(key)
+        hit = self._memo.get(key)
+        if hit is not None:
+            return hit
+
+        parts = [self.postings[kw] for kw in self.vocabulary if key in kw]
+        if not parts:
+            rows = _EMPTY
+        elif len(parts) == 1:
+            rows = parts[0]
+        else:
+            rows = np.unique(np.concatenate(parts))
+
+        if len(self._memo) >= _MAX_MEMO:
+            self._memo.clear()
+        self._memo[key] = rows
+        return rows
+
+    def search(self, query: str) -> np.ndarray:
+        """Sorted row positions matching an OR-of-AND keyword query."""
+        results = []
+        for group in parse_query(query):
+            postings = sorted((self.rows_for_key(k) for k in group), key=len)
+            results.append(reduce(
+                lambda a, b: np.intersect1d(a, b, assume_unique=True), postings))
+        if not results:
+            return _EMPTY
+        return reduce(np.union1d, results)
+
+
+# ---------------------------
+# Shared, per dataset version
+# ---------------------------
+def _build(dataset: Dataset) -> KeywordIndex:
+    df = dataset.df
+    if "KEYWORD_LIST" in df.columns:  # pre-split in the columnar copy
+        return KeywordIndex(df["KEYWORD_LIST"])
+    return KeywordIndex(split_keywords(k) for k in df["KEYWORDS"]) if "KEYWORDS" in df.columns else KeywordIndex([])
+
+
+def get_keyword_index(dataset: Dataset) -> KeywordIndex:
+    """Build (once per dataset version) and return the keyword index."""
+    return derived(dataset, "keywords", _build)
@@ -0,0 +1,122 @@
+"""Process-wide latency and counter instrumentation.
+
+Pages call `start_page(name)` at the top of the script and `end_page()` at
+the bottom; the time in between is one rerun (and, when profiling is switched
+on, one cProfile trace; see utils/profiling.py). Inside a rerun, `timed(name)`
+blocks (fetches, CSV parses, searches, renders) are recorded both overall and
+against the page running on the current thread, and `count(name, n)` bumps a
+counter (bytes fetched, cache hits ...).
+
+Every series keeps only its last WINDOW samples, so percentiles are rolling
+and memory stays flat however long the server runs. `snapshot()` is what the
+diagnostics view (utils/diagnostics.py) reads.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+from utils import profiling
+
+WINDOW = 512        # samples kept per series
+BACKGROUND = "(background)"  # spans recorded outside a page rerun (pools, warm-up)
+
+
+class Series:
+    __slots__ = ("samples", "count", "total", "max")
+
+    def __init__(self):
+        self.samples = deque(maxlen=WINDOW)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def summary(self) -> dict:
+        p50, p95, p99 = (np.percentile(self.samples, [50, 95, 99]) * 1000) if self.samples else (0.0, 0.0, 0.0)
+        return {
+            "count": self.count,
+            "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99),
+            "max_ms": self.max * 1000,
+            "total_s": self.total,
+        }
+
+
+_lock = threading.Lock()
+_pages: dict[str, Series] = {}
+_spans: dict[tuple[str, str], Series] = {}  # (page, span name)
+_counters: dict[str, int] = {}
+_local = threading.local()
+
+
+def _record(store: dict, key, seconds: float) -> None:
+    with _lock:
+        series = store.get(key)
+        if series is None:
+            series = store[key] = Series()
+        series.add(seconds)
+
+
+def current_page() -> str:
+    return getattr(_local, "page", None) or BACKGROUND
+
+
+# ---------------------------
+# Recording
+# ---------------------------
+def start_page(name: str) -> None:
+    """Mark the start of a rerun of page `name` on this thread."""
+    _local.page = name
+    _local.started = time.perf_counter()
+    profiling.start(name)
+
+
+def end_page() -> None:
+    """Record the rerun started by `start_page` (no-op if none is running)."""
+    page, started = getattr(_local, "page", None), getattr(_local, "started", None)
+    if page is None or started is None:
+        return
+    _record(_pages, page, time.perf_counter() - started)
+    _local.page = _local.started = None
+    profiling.stop()
+
+
+@contextmanager
+def timed(name: str):
+    """Time the block as span `name`, attributed to the page on this thread."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(_spans, (current_page(), name), time.perf_counter() - t0)
+
+
+def count(name: str, n: int = 1) -> None:
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+# ---------------------------
+# Reading
+# ---------------------------
+def snapshot() -> dict:
+    """Summaries of every page, span and counter recorded so far."""
+    with _lock:
+        pages = {name: s.summary() for name, s in _pages.items()}
+        spans = {key: s.summary() for key, s in _spans.items()}
+        counters = dict(_counters)
+    return {"pages": pages, "spans": spans, "counters": counters}
+
+
+def reset() -> None:
+    with _lock:
+        _pages.clear()
+        _spans.clear()
+        _counters.clear()
@@ -0,0 +1,130 @@
+"""Natural classes over the consonant feature matrix, computed with bitsets.
+
+Every segment is one bit. Each feature has a '+' mask and a '-' mask, so the
+segments matching a feature bundle are a handful of integer ANDs.
+
+A minimal specification for a set of segments T uses only the feature values
+that every member of T shares. It must also rule out every segment outside T,
+and each shared value rules out some of them. Finding the fewest values is a
+small set cover. It is solved by iterative deepening: always branch on the
+outside segment with the fewest values that rule it out, and prune when the
+remaining picks cannot cover what is left. This replaces enumerating all 3^n
+bundles.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+
+from utils.feature_matrix import FEATURES, IPA_FEATURES
+
+VALUES = ("+", "-")
+
+Spec = tuple[tuple[str, str], ...]  # ((feature, '+'/'-'), ...)
+
+
+@dataclass(frozen=True)
+class Solution:
+    target: tuple[str, ...]
+    exact: bool                 # True if some bundle picks out exactly `target`
+    specs: tuple[Spec, ...]     # every minimal bundle (empty when not exact)
+    closest: tuple[str, ...]    # smallest natural class containing `target`
+
+
+class NaturalClassIndex:
+    def __init__(self, table: dict[str, dict[str, str]], features=FEATURES):
+        self.segments = tuple(table)
+        self.features = tuple(features)
+        self.bit = {seg: 1 << i for i, seg in enumerate(self.segments)}
+        self.all = (1 << len(self.segments)) - 1
+        # masks[(feature, value)] = segments having that value
+        self.masks = {
+            (f, v): self.mask_of(seg for seg, feats in table.items() if feats.get(f) == v)
+            for f in self.features for v in VALUES
+        }
+
+    def mask_of(self, segments) -> int:
+        mask = 0
+        for seg in segments:
+            mask |= self.bit[seg]
+        return mask
+
+    def segments_of(self, mask: int) -> tuple[str, ...]:
+        return tuple(seg for seg in self.segments if mask & self.bit[seg])
+
+    # ---------------------------
+    # Bundle -> segments
+    # ---------------------------
+    def match_mask(self, bundle: dict[str, str]) -> int:
+        mask = self.all
+        for feature, value in bundle.items():
+            if value in VALUES:
+                mask &= self.masks[(feature, value)]
+        return mask
+
+    def match(self, bundle: dict[str, str]) -> tuple[str, ...]:
+        """Segments carrying every feature value in `bundle` (other values are ignored)."""
+        return self.segments_of(self.match_mask(bundle))
+
+    # ---------------------------
+    # Segments -> minimal bundles
+    # ---------------------------
+    def shared_values(self, target: int) -> list[tuple[str, str]]:
+        return [key for key, mask in self.masks.items() if target & mask == target]
+
+    def solve(self, segments) -> Solution:
+        target = self.mask_of(segments)
+        shared = self.shared_values(target) if target else []
+        closest = self.all
+        for key in shared:
+            closest &= self.masks[key]
+
+        outside = self.all & ~target
+        if not target or closest != target:
+            return Solution(self.segments_of(target), False, (), self.segments_of(closest))
+
+        # What each shared value rules out among the segments outside the target
+        excludes = {key: outside & ~self.masks[key] for key in shared}
+        excludes = {key: ex for key, ex in excludes.items() if ex}
+        specs = _min_covers(outside, excludes) if outside else [()]
+        order = {key: i for i, key in enumerate(self.masks)}
+        specs = sorted((tuple(sorted(s, key=order.__getitem__)) for s in specs),
+                       key=lambda s: [order[k] for k in s])
+        return Solution(self.segments_of(target), True, tuple(specs), self.segments_of(closest))
+
+
+def _min_covers(universe: int, sets: dict) -> list[frozenset]:
+    """All smallest collections of `sets` keys whose masks together cover `universe`."""
+    largest = max((ex.bit_count() for ex in sets.values()), default=0)
+    for size in range(1, len(sets) + 1):
+        found: set[frozenset] = set()
+
+        def search(uncovered: int, chosen: frozenset) -> None:
+            if not uncovered:
+                found.add(chosen)
+                return
+            left = size - len(chosen)
+            if left == 0 or left * largest < uncovered.bit_count():
+                return
+            # Branch on the uncovered segment that the fewest values rule out
+            best = None
+            rest = uncovered
+            while rest:
+                bit = rest & -rest
+                rest ^= bit
+                options = [k for k, ex in sets.items() if ex & bit and k not in chosen]
+                if best is None or len(options) < len(best):
+                    best = options
+                if len(best) <= 1:
+                    break
+            for key in best:
+                search(uncovered & ~sets[key], chosen | {key})
+
+        search(universe, frozenset())
+        if found:
+            return list(found)
+    return []
+
+
+@lru_cache(maxsize=1)
+def get_natural_class_index() -> NaturalClassIndex:
+    """Index over the feature matrix's consonants, built once per process."""
+    return NaturalClassIndex(IPA_FEATURES)
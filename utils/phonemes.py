@@ -0,0 +1,241 @@
+"""The consonant inventory shared by the phonetics pages, stored once.
+
+Every segment is one row of a small uint8 array. Each column is an attribute
+(articulatory descriptions and distinctive features) and holds an integer
+code into that attribute's label tuple. The store is built once per process.
+For each (attribute, label) pair it keeps a bitmask of the rows that have
+it, so finding the segments with a given value is a single dict lookup. Any
+combination of filters is a few integer ANDs. The same masks give live
+counts for every facet.
+
+The pages still receive their own shapes through views. Quiz I gets a list of
+dicts, Quiz II gets a dict keyed by symbol with its own labels, and the
+feature matrix gets symbol -> feature -> '+'/'-'. Each view is built once
+per process, so treat it as read-only.
+"""
+import random
+from functools import lru_cache
+
+import numpy as np
+
+DESCRIPTIONS = ("voicing", "place", "oro_nasal", "centrality", "manner")
+
+FEATURES = (
+    'syllabic', 'consonantal', 'sonorant', 'coronal', 'anterior',
+    'continuant', 'nasal', 'strident', 'lateral', 'delayed release', 'voice',
+)
+
+ATTRIBUTES = DESCRIPTIONS + FEATURES
+
+# Label tuples: a segment stores the index of its label
+LABELS = {
+    "voicing": ("voiced", "voiceless"),
+    "place": ("bilabial", "labiodental", "dental", "alveolar", "post-alveolar",
+              "palatal", "labio-velar", "velar", "glottal"),
+    "oro_nasal": ("oral", "nasal"),
+    "centrality": ("(central)", "lateral"),
+    "manner": ("plosive", "nasal", "fricative", "affricate", "approximant", "glide"),
+    **{feature: ("-", "+") for feature in FEATURES},
+}
+
+# symbol, voicing, place, oro-nasal, centrality, manner, features ('+'/'-' in FEATURES order)
+INVENTORY = (
+    ("p", "voiceless", "bilabial", "oral", "(central)", "plosive", "-+--+------"),
+    ("b", "voiced", "bilabial", "oral", "(central)", "plosive", "-+--+-----+"),
+    ("t", "voiceless", "alveolar", "oral", "(central)", "plosive", "-+-++------"),
+    ("d", "voiced", "alveolar", "oral", "(central)", "plosive", "-+-++-----+"),
+    ("k", "voiceless", "velar", "oral", "(central)", "plosive", "-+---------"),
+    ("g", "voiced", "velar", "oral", "(central)", "plosive", "-+--------+"),
+    ("f", "voiceless", "labiodental", "oral", "(central)", "fricative", "-+--++-+---"),
+    ("v", "voiced", "labiodental", "oral", "(central)", "fricative", "-+--++-+--+"),
+    ("θ", "voiceless", "dental", "oral", "(central)", "fricative", "-+-+++-----"),
+    ("ð", "voiced", "dental", "oral", "(central)", "fricative", "-+-+++----+"),
+    ("s", "voiceless", "alveolar", "oral", "(central)", "fricative", "-+-+++-+---"),
+    ("z", "voiced", "alveolar", "oral", "(central)", "fricative", "-+-+++-+--+"),
+    ("ʃ", "voiceless", "post-alveolar", "oral", "(central)", "fricative", "-+-+-+-+---"),
+    ("ʒ", "voiced", "post-alveolar", "oral", "(central)", "fricative", "-+-+-+-+--+"),
+    ("h", "voiceless", "glottal", "oral", "(central)", "fricative", "-+---+-----"),
+    ("tʃ", "voiceless", "post-alveolar", "oral", "(central)", "affricate", "-+-+---+-+-"),
+    ("dʒ", "voiced", "post-alveolar", "oral", "(central)", "affricate", "-+-+---+-++"),
+    ("m", "voiced", "bilabial", "nasal", "(central)", "nasal", "-++-+-+---+"),
+    ("n", "voiced", "alveolar", "nasal", "(central)", "nasal", "-++++-+---+"),
+    ("ŋ", "voiced", "velar", "nasal", "(central)", "nasal", "-++---+---+"),
+    ("l", "voiced", "alveolar", "oral", "lateral", "approximant", "-+++++--+-+"),
+    ("ɹ", "voiced", "alveolar", "oral", "(central)", "approximant", "-+++++----+"),
+    ("j", "voiced", "palatal", "oral", "(central)", "glide", "--++-+----+"),
+    ("w", "voiced", "labio-velar", "oral", "(central)", "glide", "--+--+----+"),
+)
+
+
+class PhonemeStore:
+    __slots__ = ("symbols", "row", "column", "codes", "masks")
+
+    def __init__(self, inventory=INVENTORY):
+        self.symbols = tuple(entry[0] for entry in inventory)
+        self.row = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.column = {attribute: j for j, attribute in enumerate(ATTRIBUTES)}
+        self.codes = np.empty((len(inventory), len(ATTRIBUTES)), dtype=np.uint8)
+        for i, (_, *descriptions, features) in enumerate(inventory):
+            for attribute, label in zip(ATTRIBUTES, (*descriptions, *features)):
+                self.codes[i, self.column[attribute]] = LABELS[attribute].index(label)
+        self.codes.flags.writeable = False
+        # masks[(attribute, label)] = bitmask of the rows having that label
+        self.masks = {
+            (attribute, label): self._mask(np.flatnonzero(self.codes[:, j] == code))
+            for j, attribute in enumerate(ATTRIBUTES)
+            for code, label in enumerate(LABELS[attribute])
+        }
+
+    @staticmethod
+    def _mask(rows) -> int:
+        mask = 0
+        for i in rows:
+            mask |= 1 << int(i)
+        return mask
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def value(self, symbol: str, attribute: str) -> str:
+        return LABELS[attribute][self.codes[self.row[symbol], self.column[attribute]]]
+
+    def mask(self, attribute: str, label: str) -> int:
+        return self.masks.get((attribute, label), 0)
+
+    def symbols_of(self, mask: int) -> tuple[str, ...]:
+        return tuple(symbol for i, symbol in enumerate(self.symbols) if mask >> i & 1)
+
+    def with_value(self, attribute: str, label: str) -> tuple[str, ...]:
+        """Symbols whose `attribute` is `label`."""
+        return self.symbols_of(self.mask(attribute, label))
+
+    def describe(self, symbol: str, attributes=DESCRIPTIONS) -> dict[str, str]:
+        codes = self.codes[self.row[symbol]]
+        return {a: LABELS[a][codes[self.column[a]]] for a in attributes}
+
+    # ---------------------------
+    # Faceted filtering
+    # ---------------------------
+    def filter_mask(self, selection: dict[str, str]) -> int:
+        """Rows matching every (attribute, label) in `selection`."""
+        mask = (1 << len(self.symbols)) - 1
+        for attribute, label in selection.items():
+            mask &= self.mask(attribute, label)
+        return mask
+
+    def facet_counts(self, selection: dict[str, str], facets=DESCRIPTIONS) -> dict[str, dict[str, int]]:
+        """For every facet, how many rows each of its labels would leave.
+
+        A facet's counts apply the other facets' selections but not its own,
+        so they show what switching that facet to each label would yield.
+        """
+        counts = {}
+        for facet in facets:
+            base = self.filter_mask({a: v for a, v in selection.items() if a != facet})
+            counts[facet] = {label: (base & self.mask(facet, label)).bit_count() for label in LABELS[facet]}
+            counts[facet][None] = base.bit_count()  # the facet left unset
+        return counts
+
+
+@lru_cache(maxsize=1)
+def get_phoneme_store() -> PhonemeStore:
+    """The shared inventory, built once per process."""
+    return PhonemeStore()
+
+
+# ---------------------------
+# Pairs
+# ---------------------------
+class PairTable:
+    """Every pair of distinct-sounding segments and the attributes they differ in.
+
+    `diff[k]` is a bitmask over `attributes` (bit j set = attributes[j]
+    differs) for the pair (first[k], second[k]). `levels[n]` holds the
+    indices of the pairs that differ in exactly n attributes, so drawing a
+    pair of a given difficulty is O(1).
+    """
+    __slots__ = ("attributes", "first", "second", "diff", "levels")
+
+    def __init__(self, store: PhonemeStore, attributes=DESCRIPTIONS):
+        self.attributes = tuple(attributes)
+        codes = store.codes[:, [store.column[a] for a in self.attributes]]
+        first, second = np.triu_indices(len(store), k=1)
+        differs = codes[first] != codes[second]
+        n_diff = differs.sum(axis=1)
+        keep = n_diff > 0  # pairs identical in every attribute are never asked
+        self.first = first[keep].astype(np.uint8)
+        self.second = second[keep].astype(np.uint8)
+        self.diff = (differs[keep] @ (1 << np.arange(len(self.attributes)))).astype(np.uint8)
+        self.levels = {int(n): np.flatnonzero(n_diff[keep] == n) for n in np.unique(n_diff[keep])}
+
+    def __len__(self) -> int:
+        return len(self.diff)
+
+    def draw(self, level: int | None = None, rng=random) -> tuple[int, int, int]:
+        """A random (row, row, diff mask), from `level` differing attributes if given."""
+        if level is None:
+            k = rng.randrange(len(self.diff))
+        else:
+            bucket = self.levels[level]
+            k = bucket[rng.randrange(len(bucket))]
+        a, b = int(self.first[k]), int(self.second[k])
+        if rng.random() < 0.5:
+            a, b = b, a
+        return a, b, int(self.diff[k])
+
+    def mask_of(self, attributes) -> int:
+        return sum(1 << self.attributes.index(a) for a in set(attributes))
+
+    def attributes_of(self, mask: int) -> list[str]:
+        return [a for j, a in enumerate(self.attributes) if mask >> j & 1]
+
+
+@lru_cache(maxsize=1)
+def get_pair_table() -> PairTable:
+    """Pairs over the shared inventory's descriptive attributes, built once per process."""
+    return PairTable(get_phoneme_store())
+
+
+# ---------------------------
+# Page views
+# ---------------------------
+# Quiz II's answer labels
+QUIZ_II_PLACE = {"labiodental": "labio-dental", "post-alveolar": "palato-alveolar"}
+QUIZ_II_MANNER = {"plosive": "stop", "nasal": "stop", "glide": "approximant"}
+
+# The feature matrix writes [ɹ] as 'r' and orders affricates after the stops
+MATRIX_SYMBOLS = {"ɹ": "r"}
+MATRIX_ORDER = ("p", "b", "t", "d", "k", "g", "tʃ", "dʒ", "f", "v", "θ", "ð",
+                "s", "z", "ʃ", "ʒ", "h", "m", "n", "ŋ", "l", "ɹ", "j", "w")
+
+
+@lru_cache(maxsize=1)
+def quiz_consonants() -> list[dict]:
+    """Quiz I: [{"symbol", "voicing", "place", "oro_nasal", "centrality", "manner"}, ...]."""
+    store = get_phoneme_store()
+    return [{"symbol": symbol, **store.describe(symbol)} for symbol in store.symbols]
+
+
+@lru_cache(maxsize=1)
+def quiz_ipa_data() -> dict[str, dict[str, str]]:
+    """Quiz II: symbol -> {"Voicing", "Place", "Manner", "Oro-nasal", "Centrality"}."""
+    store = get_phoneme_store()
+    data = {}
+    for symbol in store.symbols:
+        d = store.describe(symbol)
+        nasal = d["oro_nasal"] == "nasal"
+        data[symbol] = {
+            "Voicing": d["voicing"],
+            "Place": QUIZ_II_PLACE.get(d["place"], d["place"]),
+            "Manner": QUIZ_II_MANNER.get(d["manner"], d["manner"]),
+            "Oro-nasal": "nasal" if nasal else "(oral)",
+            "Centrality": "(not applicable)" if nasal else d["centrality"],
+        }
+    return data
+
+
+@lru_cache(maxsize=1)
+def matrix_features() -> dict[str, dict[str, str]]:
+    """Feature matrix: symbol -> feature -> '+' / '-'."""
+    store = get_phoneme_store()
+    return {MATRIX_SYMBOLS.get(s, s): store.describe(s, FEATURES) for s in MATRIX_ORDER}
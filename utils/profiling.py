@@ -0,0 +1,215 @@
+"""Opt-in cProfile traces, one per page rerun.
+
+Switched on for the whole server with APP4U_PROFILE=1, or for a single
+browser session by opening any page with ``?profile=1`` (remembered in the
+session, ``?profile=0`` turns it off again). While on,
+`utils.metrics.start_page` / `end_page` wrap each rerun of HOME.py and the
+pages in a profiler and write one ``.prof`` file per rerun, named after the
+time, page and session id. Only the newest APP4U_PROFILE_KEEP traces
+(default 50) are kept in APP4U_PROFILE_DIR (default ~/.cache/app4u/profiles).
+
+Only one rerun is profiled at a time: from Python 3.12 cProfile sits on the
+process-wide sys.monitoring hooks, so two profilers cannot run at once. A
+rerun waits up to PROFILE_WAIT seconds for the running one to finish; if it
+is still busy the rerun goes unprofiled, the session gets a toast saying so,
+and the diagnostics view shows how many were skipped.
+
+List traces, or show the top cumulative functions of one, with
+
+    python -m utils.profiling
+    python -m utils.profiling <trace.prof> [-n 30]
+
+(the hidden diagnostics view has the same viewer).
+"""
+import argparse
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "app4u", "profiles")
+DEFAULT_KEEP = 50
+QUERY_PARAM = "profile"
+SESSION_KEY = "_app4u_profile"
+SUFFIX = ".prof"
+PROFILE_WAIT = 2.0  # seconds a rerun waits for the profiler to be free
+
+_local = threading.local()
+_ring_lock = threading.Lock()
+_profile_lock = threading.Lock()  # held from start() to stop() by the profiled rerun
+_holder_lock = threading.Lock()   # guards _holder
+_holder: tuple[threading.Thread, cProfile.Profile] | None = None
+skipped = 0  # reruns left unprofiled because another one held the profiler
+
+
+def profile_dir() -> str:
+    return os.environ.get("APP4U_PROFILE_DIR", DEFAULT_DIR)
+
+
+def _keep() -> int:
+    return max(1, int(os.environ.get("APP4U_PROFILE_KEEP", DEFAULT_KEEP)))
+
+
+def _session_id() -> str:
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+    except ImportError:
+        ctx = None
+    return ctx.session_id if ctx is not None else "nosession"
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", text).strip("-")
+
+
+def enabled() -> bool:
+    if os.environ.get("APP4U_PROFILE", "").lower() in ("1", "true", "yes"):
+        return True
+    try:
+        import streamlit as st
+        flag = st.query_params.get(QUERY_PARAM)
+        if flag is not None:
+            st.session_state[SESSION_KEY] = flag == "1"
+        return bool(st.session_state.get(SESSION_KEY, False))
+    except Exception:
+        return False  # no script context (CLI, warm-up thread)
+
+
+# ---------------------------
+# Recording
+# ---------------------------
+def _release(profiler: cProfile.Profile) -> None:
+    """Stop `profiler` and free the profiling slot, if it still holds it."""
+    global _holder
+    with _holder_lock:
+        if _holder is None or _holder[1] is not profiler:
+            return
+        _holder[1].disable()
+        _holder = None
+        _profile_lock.release()
+
+
+def _notify_skipped() -> None:
+    global skipped
+    with _holder_lock:
+        skipped += 1
+    try:
+        import streamlit as st
+        st.toast("Profiling skipped for this rerun: another rerun is being profiled.", icon="⏱️")
+    except Exception:
+        pass  # no script context
+
+
+def start(page: str) -> None:
+    """Start profiling this thread's rerun of `page`, if profiling is on."""
+    global _holder
+    stale = getattr(_local, "profiler", None)
+    if stale is not None:
+        # The previous rerun ended early (st.rerun / st.stop): drop its partial trace
+        _local.profiler = None
+        _release(stale)
+    if not enabled():
+        return
+    holder = _holder
+    if holder is not None and not holder[0].is_alive():
+        _release(holder[1])  # its thread ended mid-rerun without calling stop()
+    if not _profile_lock.acquire(timeout=PROFILE_WAIT):
+        _notify_skipped()
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Some other profiler (not ours) owns the interpreter
+        _profile_lock.release()
+        _notify_skipped()
+        return
+    with _holder_lock:
+        _holder = (threading.current_thread(), profiler)
+    _local.profiler = profiler
+    _local.page = page
+
+
+def stop() -> str | None:
+    """Stop this thread's profiler and write its trace; returns the trace path."""
+    profiler = getattr(_local, "profiler", None)
+    if profiler is None:
+        return None
+    _local.profiler = None
+    _release(profiler)
+
+    now = time.time()
+    stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now * 1000) % 1000:03d}"
+    name = f"{stamp}-{_slug(_local.page) or 'page'}-{_slug(_session_id())[:8]}{SUFFIX}"
+    os.makedirs(profile_dir(), exist_ok=True)
+    path = os.path.join(profile_dir(), name)
+    profiler.dump_stats(path + ".tmp")
+    os.replace(path + ".tmp", path)  # viewers never see a half-written trace
+    _trim()
+    return path
+
+
+def _trim() -> None:
+    with _ring_lock:
+        traces = list_traces()
+        for name in traces[_keep():]:
+            try:
+                os.remove(os.path.join(profile_dir(), name))
+            except OSError:
+                pass
+
+
+# ---------------------------
+# Viewing
+# ---------------------------
+def list_traces() -> list[str]:
+    """Trace file names, newest first."""
+    try:
+        names = [n for n in os.listdir(profile_dir()) if n.endswith(SUFFIX)]
+    except OSError:
+        return []
+    return sorted(names, reverse=True)
+
+
+def top_functions(name: str, limit: int = 30) -> list[dict]:
+    """The `limit` functions with the highest cumulative time in trace `name`."""
+    stats = pstats.Stats(os.path.join(profile_dir(), os.path.basename(name)), stream=io.StringIO())
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append({
+            "function": f"{func} ({os.path.basename(filename)}:{line})",
+            "calls": nc,
+            "tottime_ms": round(tt * 1000, 3),
+            "cumtime_ms": round(ct * 1000, 3),
+            "path": filename,
+        })
+    rows.sort(key=lambda r: r["cumtime_ms"], reverse=True)
+    return rows[:limit]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="List page-rerun profiles or show one.")
+    parser.add_argument("trace", nargs="?", help="trace file name (from the listing)")
+    parser.add_argument("-n", type=int, default=30, help="functions to show")
+    args = parser.parse_args(argv)
+
+    if not args.trace:
+        traces = list_traces()
+        if not traces:
+            print(f"No traces in {profile_dir()} (enable with APP4U_PROFILE=1 or ?profile=1).")
+        for name in traces:
+            print(name)
+        return 0
+
+    for r in top_functions(args.trace, args.n):
+        print(f"{r['cumtime_ms']:10.1f} ms cum {r['tottime_ms']:10.1f} ms own {r['calls']:8d}  {r['function']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Process-wide cache of search results, shared by every session.
+
+Entries are keyed on (dataset, search mode, normalized query, k) and hold
+the resulting (row, score) tuples. Each entry remembers the dataset version
+it was computed from; the first lookup that sees a new version drops all of
+that dataset's entries. The cache is bounded by entry count with LRU eviction.
+
+Size: APP4U_QUERY_CACHE_SIZE (default 512 entries).
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+
+DEFAULT_SIZE = 512
+
+
+def normalize_query(query: str, lower: bool = True) -> str:
+    query = re.sub(r"\s+", " ", (query or "").strip())
+    return query.lower() if lower else query
+
+
+class QueryCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple] = OrderedDict()
+        self._versions: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, name: str, version: str) -> None:
+        if self._versions.get(name) == version:
+            return
+        if name in self._versions:
+            stale = [key for key in self._entries if key[0] == name]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        self._versions[name] = version
+
+    def get_or_compute(self, name: str, version: str, key: tuple, compute):
+        full_key = (name, *key)
+        with self._lock:
+            self._check_version(name, version)
+            hit = self._entries.get(full_key)
+            if hit is not None:
+                self._entries.move_to_end(full_key)
+                self.hits += 1
+                return hit
+
+        value = tuple(compute())  # searched outside the lock
+        with self._lock:
+            self.misses += 1
+            if self._versions.get(name) == version:  # not invalidated meanwhile
+                self._entries[full_key] = value
+                self._entries.move_to_end(full_key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+query_cache = QueryCache(int(os.environ.get("APP4U_QUERY_CACHE_SIZE", DEFAULT_SIZE)))
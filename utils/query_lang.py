@@ -0,0 +1,197 @@
+"""Small structured query language for the "Query" search mode.
+
+    year:2015..2020 kw:tapping text:"flap"
+    (kw:aspiration OR kw:flap) AND NOT year:2005..2010
+    fuzzy:fl4p year:2020
+
+Terms are ``field:value`` (``year``, ``kw``, ``text``, ``fuzzy``) or a bare
+word / "quoted phrase", which searches the exam text. Adjacent terms are
+AND'ed; ``AND``, ``OR``, ``NOT`` and parentheses combine them. Operators
+must be written in uppercase, so a lowercase "not" or "or" is a search word;
+queries are therefore parsed before any lowercasing (term values are
+lowercased when they are evaluated).
+
+A query string is parsed once (memoized) into a small tree. Evaluation turns
+each term into one boolean row mask using the prebuilt indexes (or a single
+vectorized comparison for years) and combines masks with NumPy &, |, ~.
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from utils.bm25 import search_text
+from utils.datasets import Dataset, derived
+from utils.keyword_index import get_keyword_index
+from utils.trigram import get_trigram_index
+
+FIELDS = {
+    "year": "year",
+    "kw": "kw", "keyword": "kw", "keywords": "kw",
+    "text": "text",
+    "fuzzy": "fuzzy",
+}
+
+# Column each field needs; a term on a missing column matches nothing
+FIELD_COLUMNS = {"year": "YEAR", "kw": "KEYWORDS", "text": "TEXT", "fuzzy": "TEXT"}
+
+_TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|(\w+):("[^"]*"|[^\s()]+)|("[^"]*")|([^\s()]+))')
+_YEAR_RANGE_RE = re.compile(r"^(\d{4})?\.\.(\d{4})?$")
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+# ---------------------------
+# Parsing
+# ---------------------------
+def _tokenize(query: str) -> list[tuple]:
+    tokens, pos = [], 0
+    query = query.strip()
+    while pos < len(query):
+        m = _TOKEN_RE.match(query, pos)
+        if not m or m.end() == pos:
+            raise QuerySyntaxError(f"Cannot read the query near: {query[pos:]!r}")
+        pos = m.end()
+        lparen, rparen, field, fvalue, quoted, word = m.groups()
+        if lparen:
+            tokens.append(("(",))
+        elif rparen:
+            tokens.append((")",))
+        elif field:
+            name = FIELDS.get(field.lower())
+            if name is None:
+                raise QuerySyntaxError(f"Unknown field '{field}:' (use year:, kw:, text: or fuzzy:)")
+            tokens.append(("term", name, fvalue))
+        elif quoted:
+            tokens.append(("term", "text", quoted))
+        elif word in ("AND", "OR", "NOT"):
+            tokens.append((word,))
+        else:
+            tokens.append(("term", "text", word))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.i = 0
+
+    def peek(self):
+        return self.tokens[self.i][0] if self.i < len(self.tokens) else None
+
+    def take(self):
+        tok = self.tokens[self.i]
+        self.i += 1
+        return tok
+
+    def parse(self):
+        if not self.tokens:
+            raise QuerySyntaxError("Empty query.")
+        node = self.or_expr()
+        if self.peek() is not None:
+            raise QuerySyntaxError("Unbalanced ')' in query.")
+        return node
+
+    def or_expr(self):
+        parts = [self.and_expr()]
+        while self.peek() == "OR":
+            self.take()
+            parts.append(self.and_expr())
+        return parts[0] if len(parts) == 1 else ("or", tuple(parts))
+
+    def and_expr(self):
+        parts = [self.not_expr()]
+        while self.peek() in ("AND", "NOT", "(", "term"):
+            if self.peek() == "AND":
+                self.take()
+            parts.append(self.not_expr())
+        return parts[0] if len(parts) == 1 else ("and", tuple(parts))
+
+    def not_expr(self):
+        if self.peek() == "NOT":
+            self.take()
+            return ("not", self.not_expr())
+        return self.atom()
+
+    def atom(self):
+        kind = self.peek()
+        if kind == "(":
+            self.take()
+            node = self.or_expr()
+            if self.peek() != ")":
+                raise QuerySyntaxError("Missing ')' in query.")
+            self.take()
+            return node
+        if kind == "term":
+            _, field, value = self.take()
+            return ("term", field, value)
+        raise QuerySyntaxError("Expected a search term.")
+
+
+@lru_cache(maxsize=1024)
+def parse_query(query: str):
+    """Parse once into a tree of ('and'|'or', parts), ('not', x), ('term', field, value)."""
+    return _Parser(_tokenize(query)).parse()
+
+
+# ---------------------------
+# Evaluation
+# ---------------------------
+def _year_numbers(dataset: Dataset) -> np.ndarray:
+    years = dataset.df["YEAR"].astype(str).str[:4]
+    return pd.to_numeric(years, errors="coerce").to_numpy(dtype=float)
+
+
+def _rows_to_mask(rows, n: int) -> np.ndarray:
+    mask = np.zeros(n, dtype=bool)
+    mask[np.asarray(rows, dtype=np.int64)] = True
+    return mask
+
+
+def _term_mask(dataset: Dataset, field: str, value: str) -> np.ndarray:
+    df = dataset.df
+    n = len(df)
+    if FIELD_COLUMNS[field] not in df.columns:
+        return np.zeros(n, dtype=bool)
+
+    value = value.strip('"').strip().lower()
+    if not value:
+        return np.zeros(n, dtype=bool)
+
+    if field == "year":
+        m = _YEAR_RANGE_RE.match(value)
+        if m:
+            years = derived(dataset, "year_numbers", _year_numbers)
+            lo = float(m.group(1)) if m.group(1) else -np.inf
+            hi = float(m.group(2)) if m.group(2) else np.inf
+            return (years >= lo) & (years <= hi)
+        return df["YEAR"].astype(str).str.startswith(value).to_numpy(dtype=bool)
+
+    if field == "kw":
+        return _rows_to_mask(get_keyword_index(dataset).search(value), n)
+
+    if field == "fuzzy":
+        return _rows_to_mask([r for r, _ in get_trigram_index(dataset).search(value)], n)
+
+    # Same substring match as "Words containing": a quoted phrase must appear as typed
+    return _rows_to_mask([r for r, _ in search_text(dataset, value)], n)
+
+
+def evaluate(node, dataset: Dataset) -> np.ndarray:
+    """Boolean mask (one entry per dataset row) for a parsed query."""
+    kind = node[0]
+    if kind == "term":
+        return _term_mask(dataset, node[1], node[2])
+    if kind == "not":
+        return ~evaluate(node[1], dataset)
+    masks = [evaluate(part, dataset) for part in node[1]]
+    combine = np.logical_and if kind == "and" else np.logical_or
+    return combine.reduce(masks)
+
+
+def query_rows(dataset: Dataset, query: str) -> np.ndarray:
+    """Row positions matching a structured query, in file order."""
+    return np.flatnonzero(evaluate(parse_query(query), dataset))
@@ -0,0 +1,133 @@
+"""Search-mode dispatch shared by the TCE search pages.
+
+`search_rows` maps a (mode, query) pair onto the prebuilt per-dataset
+indexes and returns every matching (row, score) pair, best first, memoized
+across sessions in utils/query_cache.py. The unified search runs it over
+every subject on a thread pool and streams results back per subject.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from utils.bm25 import search_text
+from utils import metrics
+from utils.datasets import Dataset, load_dataset
+from utils.keyword_index import get_keyword_index
+from utils.query_cache import normalize_query, query_cache
+from utils.query_lang import query_rows
+from utils.trigram import get_trigram_index
+
+SEARCH_MODES = ("YEAR", "Keywords", "Words containing", "Fuzzy", "Query")
+
+# Column each mode needs in the dataset (None: checked per term, see utils/query_lang.py)
+MODE_COLUMNS = {"YEAR": "YEAR", "Keywords": "KEYWORDS", "Words containing": "TEXT", "Fuzzy": "TEXT", "Query": None}
+
+# Exam datasets covered by "Search everything", in display order
+SUBJECTS = ("Phonology", "Syntax", "Semantics", "Grammar")
+
+RRF_K = 60  # reciprocal rank fusion constant used by merge_hits
+
+# Help text for the pages' query boxes (what the ranked modes match)
+SEARCH_HELP = (
+    "**Words containing** finds rows whose text contains what you typed, anywhere and in any case: "
+    "*tion* finds *distribution*, and *word stress* finds that exact phrase. Best matches come first.  \n"
+    "**Fuzzy** finds rows that have every query word, allowing small typos."
+)
+
+
+def search_rows(dataset: Dataset, mode: str, query: str, k: int | None = None) -> tuple[tuple[int, float], ...]:
+    """Return (row, score) pairs for `query`, best first (file order when unranked).
+
+    `k` keeps only the best k of the ranked modes; None returns every match.
+    Results are shared across sessions through the process-wide query cache.
+    """
+    if mode not in MODE_COLUMNS:
+        raise ValueError(f"Unknown search mode: {mode}")
+    # "Query" keeps its case: only uppercase AND / OR / NOT are operators
+    query = normalize_query(query, lower=mode != "Query")
+    column = MODE_COLUMNS[mode]
+    if not query or (column is not None and column not in dataset.df.columns):
+        return ()
+    with metrics.timed(f"search: {mode}"):
+        return query_cache.get_or_compute(
+            dataset.name, dataset.version, (mode, query, k),
+            lambda: _search_rows(dataset, mode, query, k),
+        )
+
+
+def _search_rows(dataset: Dataset, mode: str, query: str, k: int | None) -> list[tuple[int, float]]:
+    df = dataset.df
+
+    if mode == "YEAR":
+        rows = np.flatnonzero(df["YEAR"].str.startswith(query[:4]).to_numpy(dtype=bool))
+    elif mode == "Keywords":
+        rows = get_keyword_index(dataset).search(query)
+    elif mode == "Query":
+        rows = query_rows(dataset, query)
+    elif mode == "Words containing":
+        return search_text(dataset, query, k=k)
+    else:
+        return get_trigram_index(dataset).search(query, k=k)
+    return [(int(r), 1.0) for r in rows]
+
+
+# ---------------------------
+# Unified search
+# ---------------------------
+@dataclass(frozen=True)
+class Hit:
+    subject: str
+    row: int
+    year: str
+    keywords: str
+    score: float  # index score within the subject; merge_hits replaces it with the fused score
+
+
+_pool = ThreadPoolExecutor(max_workers=len(SUBJECTS), thread_name_prefix="tce-search")
+
+
+def search_subject(subject: str, mode: str, query: str, k: int | None = None) -> list[Hit]:
+    dataset = load_dataset(subject)
+    ranked = search_rows(dataset, mode, query, k=k)
+    if not ranked:
+        return []
+
+    df = dataset.df
+    years = df["YEAR"] if "YEAR" in df.columns else None
+    keywords = df["KEYWORDS"] if "KEYWORDS" in df.columns else None
+    return [
+        Hit(
+            subject=subject,
+            row=row,
+            year=years.iat[row] if years is not None else "",
+            keywords=keywords.iat[row] if keywords is not None else "",
+            score=score,
+        )
+        for row, score in ranked
+    ]
+
+
+def iter_search_all(mode: str, query: str, subjects=SUBJECTS, k: int | None = None):
+    """Yield (subject, hits, error) as each subject's search finishes."""
+    futures = {_pool.submit(search_subject, s, mode, query, k): s for s in subjects}
+    for fut in as_completed(futures):
+        subject = futures[fut]
+        try:
+            yield subject, fut.result(), None
+        except Exception as e:
+            yield subject, [], e
+
+
+def merge_hits(groups, subjects=SUBJECTS) -> list[Hit]:
+    """Merge per-subject hits into one ranking by reciprocal rank fusion.
+
+    BM25 scores depend on each subject's IDF and document lengths, and the
+    unranked modes score everything 1.0, so raw scores cannot be compared
+    across subjects. Each hit instead scores 1 / (RRF_K + its rank within its
+    subject): every subject's best hit comes first, then every second best,
+    and so on (ties keep subject order).
+    """
+    order = {s: i for i, s in enumerate(subjects)}
+    hits = [replace(h, score=1.0 / (RRF_K + rank)) for group in groups for rank, h in enumerate(group, start=1)]
+    return sorted(hits, key=lambda h: (-h.score, order.get(h.subject, len(order)), h.row))
@@ -0,0 +1,179 @@
+"""Spaced repetition (SM-2) for the terminology flashcards, persisted in SQLite.
+
+Each (user, card) pair has one row holding its SM-2 state and the time it is
+next due. Rows are keyed by (user, card), and a second index on (user, due)
+lets the due query read only that user's due rows, oldest first. There is
+no scan over other users or over review history. The database runs in WAL
+mode so page reads never wait on a write.
+
+Grades are applied to the session's copy of the card at once. Writes to the
+database are buffered and go out in a single transaction per batch. A batch
+is written when FLUSH_EVERY grades are waiting, or when a grade arrives and
+the oldest waiting one is FLUSH_SECONDS old. It is also written before any
+read, when a deck ends, and at exit.
+
+Configuration (environment variables):
+    APP4U_FLASHCARDS_DB       database file (default ~/.cache/app4u/flashcards.sqlite3)
+"""
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, replace
+
+from utils import metrics
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "app4u", "flashcards.sqlite3")
+
+DAY = 86400.0
+RELEARN_SECONDS = 600   # a missed card is due again 10 minutes later
+FLUSH_EVERY = 20        # grades buffered before a write
+FLUSH_SECONDS = 5.0     # age of the oldest buffered grade that forces a write
+
+# SM-2 quality for the page's two buttons ("Got it right" / "Missed it")
+QUALITY_RIGHT = 4
+QUALITY_MISSED = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cards (
+    user        TEXT NOT NULL,
+    card        TEXT NOT NULL,
+    reps        INTEGER NOT NULL,   -- correct answers in a row
+    interval    REAL NOT NULL,      -- days
+    ease        REAL NOT NULL,
+    lapses      INTEGER NOT NULL,
+    due         REAL NOT NULL,      -- unix time
+    reviewed    REAL NOT NULL,
+    PRIMARY KEY (user, card)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cards_user_due ON cards (user, due);
+"""
+
+
+@dataclass(frozen=True)
+class CardState:
+    reps: int = 0
+    interval: float = 0.0
+    ease: float = 2.5
+    lapses: int = 0
+    due: float = 0.0
+    reviewed: float = 0.0
+
+    @property
+    def new(self) -> bool:
+        return self.reviewed == 0.0
+
+
+def review(state: CardState, quality: int, now: float) -> CardState:
+    """SM-2: the card's state after an answer of `quality` (0-5) at `now`."""
+    ease = max(1.3, state.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    if quality < 3:
+        return replace(state, reps=0, interval=0.0, ease=ease, lapses=state.lapses + 1,
+                       due=now + RELEARN_SECONDS, reviewed=now)
+    if state.reps == 0:
+        interval = 1.0
+    elif state.reps == 1:
+        interval = 6.0
+    else:
+        interval = round(state.interval * state.ease, 2)
+    return replace(state, reps=state.reps + 1, interval=interval, ease=ease,
+                   due=now + interval * DAY, reviewed=now)
+
+
+class CardStore:
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._pending: dict[tuple[str, str], CardState] = {}
+        self._oldest = 0.0
+
+    # ---------------------------
+    # Writing
+    # ---------------------------
+    def grade(self, user: str, card: str, state: CardState, correct: bool, now: float | None = None) -> CardState:
+        """Apply a grade and queue the new state for the next batch write."""
+        now = time.time() if now is None else now
+        new = review(state, QUALITY_RIGHT if correct else QUALITY_MISSED, now)
+        with self._lock:
+            if not self._pending:
+                self._oldest = now
+            self._pending[(user, card)] = new
+            due = len(self._pending) >= FLUSH_EVERY or now - self._oldest >= FLUSH_SECONDS
+        if due:
+            self.flush()
+        return new
+
+    def flush(self) -> int:
+        """Write every queued grade in one transaction; returns how many."""
+        with self._lock:
+            if not self._pending:
+                return 0
+            rows = [(user, card, s.reps, s.interval, s.ease, s.lapses, s.due, s.reviewed)
+                    for (user, card), s in self._pending.items()]
+            with metrics.timed("flashcards: write"), self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO cards VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._pending.clear()
+        return len(rows)
+
+    # ---------------------------
+    # Reading
+    # ---------------------------
+    def _query(self, sql: str, params) -> list[tuple]:
+        self.flush()  # reads see every grade made so far
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def states(self, user: str) -> dict[str, CardState]:
+        """Every card `user` has reviewed."""
+        rows = self._query(
+            "SELECT card, reps, interval, ease, lapses, due, reviewed FROM cards WHERE user = ?", (user,))
+        return {card: CardState(*rest) for card, *rest in rows}
+
+    def due(self, user: str, now: float | None = None, limit: int = -1) -> list[str]:
+        """Cards due for `user`, longest overdue first (uses the (user, due) index)."""
+        now = time.time() if now is None else now
+        rows = self._query(
+            "SELECT card FROM cards WHERE user = ? AND due <= ? ORDER BY due LIMIT ?", (user, now, limit))
+        return [card for (card,) in rows]
+
+    def due_count(self, user: str, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        return self._query("SELECT COUNT(*) FROM cards WHERE user = ? AND due <= ?", (user, now))[0][0]
+
+    def build_deck(self, user: str, cards, n: int, rng, now: float | None = None) -> list[str]:
+        """`n` cards: due ones first, then never-seen ones (shuffled), then the soonest due."""
+        cards = list(cards)
+        known = set(cards)
+        states = self.states(user)
+        deck = [c for c in self.due(user, now) if c in known][:n]
+        if len(deck) < n:
+            unseen = [c for c in cards if c not in states]
+            rng.shuffle(unseen)
+            deck += unseen[:n - len(deck)]
+        if len(deck) < n:
+            taken = set(deck)
+            upcoming = sorted((c for c in states if c in known and c not in taken), key=lambda c: states[c].due)
+            deck += upcoming[:n - len(deck)]
+        return deck
+
+
+_store: CardStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_card_store() -> CardStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CardStore(os.environ.get("APP4U_FLASHCARDS_DB", DEFAULT_PATH))
+                atexit.register(_store.flush)
+    return _store
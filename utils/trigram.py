@@ -0,0 +1,154 @@
+"""Typo-tolerant ("Fuzzy") search over the OCR-noisy TEXT column.
+
+Matching happens at the word level: every distinct TEXT word is split into
+padded character trigrams, and a query word's trigrams select candidate
+vocabulary words via their postings. Edits are insertions, deletions,
+substitutions and swaps of adjacent letters ("tenes" -> "tense" is one).
+One edit changes at most four of a word's trigrams and at most one letter
+count each way, so a word within `max_edits_for` edits shares at least
+(trigrams - 4 * edits) of them and differs in at most `edits` letters.
+Only candidates passing both bounds get an edit-distance check, and no typo
+within the limit is filtered out. Words too short for the trigram bound
+start from the vocabulary words of similar length instead. Matching words
+are then mapped back to the rows that contain them; multi-word queries
+require every word.
+"""
+import heapq
+
+import numpy as np
+
+from utils.bm25 import term_doc_pairs, tokenize
+from utils.datasets import Dataset, derived
+
+EDIT_GRAMS = 4  # trigrams one edit can change (a swap of two letters touches four)
+LETTER_BINS = 32  # letters are counted in ord(c) % 32 bins for the letter-count bound
+
+
+def trigrams(word: str) -> set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def letter_counts(word: str) -> np.ndarray:
+    return np.bincount([ord(c) % LETTER_BINS for c in word], minlength=LETTER_BINS).astype(np.int16)
+
+
+def max_edits_for(word: str) -> int:
+    if len(word) <= 2:
+        return 0
+    return 1 if len(word) <= 5 else 2
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Edit distance counting a swap of adjacent letters as one edit (optimal string
+    alignment), giving up (returning limit + 1) once it exceeds `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, prev = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            d = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if before is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                d = min(d, before[j - 2] + 1)
+            cur.append(d)
+        if min(cur) > limit and min(prev) > limit:
+            return limit + 1
+        before, prev = prev, cur
+    return prev[-1]
+
+
+class TrigramIndex:
+    def __init__(self, texts):
+        words, word_ids, rows, _, _ = term_doc_pairs(texts)
+        self.words = words
+        self.word_rows = np.split(rows, np.cumsum(np.bincount(word_ids, minlength=len(words)))[:-1])
+
+        grams: dict[str, list[int]] = {}
+        gram_counts = np.zeros(len(self.words), dtype=np.int32)
+        for wid, word in enumerate(self.words):
+            word_grams = trigrams(word)
+            gram_counts[wid] = len(word_grams)
+            for g in word_grams:
+                grams.setdefault(g, []).append(wid)
+        self.gram_counts = gram_counts
+        self.postings = {g: np.asarray(ids, dtype=np.int32) for g, ids in grams.items()}
+        self.lengths = np.fromiter((len(w) for w in self.words), dtype=np.int32, count=len(self.words))
+        self.by_length = {int(n): np.flatnonzero(self.lengths == n) for n in np.unique(self.lengths)}
+        # Letter counts per word; one edit changes them by at most one letter each way
+        bins = np.fromiter((ord(c) % LETTER_BINS for w in self.words for c in w), dtype=np.int64,
+                           count=int(self.lengths.sum()))
+        self.letters = np.zeros((len(self.words), LETTER_BINS), dtype=np.int16)
+        np.add.at(self.letters, (np.repeat(np.arange(len(self.words)), self.lengths), bins), 1)
+
+    def similar_words(self, word: str) -> list[tuple[int, float]]:
+        """(word id, trigram similarity) for vocabulary words within edit distance of `word`."""
+        query_grams = trigrams(word)
+        limit = max_edits_for(word)
+        lists = [self.postings[g] for g in query_grams if g in self.postings]
+        if lists:
+            ids, shared = np.unique(np.concatenate(lists), return_counts=True)
+        else:
+            ids, shared = np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64)
+
+        if len(query_grams) <= EDIT_GRAMS * limit:
+            # Too short for the trigram bound: every word of a close length is a candidate
+            near = [self.by_length[n] for n in range(len(word) - limit, len(word) + limit + 1) if n in self.by_length]
+            cand = np.concatenate(near) if near else np.zeros(0, dtype=np.int64)
+            counts = dict(zip(ids.tolist(), shared.tolist()))
+            ids = cand
+            shared = np.asarray([counts.get(i, 0) for i in cand.tolist()], dtype=np.int64)
+
+        # Cheap lower bounds on the edit distance; only survivors get the exact check
+        diff = self.letters[ids] - letter_counts(word)
+        keep = (
+            (np.abs(self.lengths[ids] - len(word)) <= limit)
+            & (shared >= np.maximum(len(query_grams), self.gram_counts[ids]) - EDIT_GRAMS * limit)
+            & (np.maximum(diff.clip(min=0).sum(axis=1), (-diff).clip(min=0).sum(axis=1)) <= limit)
+        )
+        ids, shared = ids[keep], shared[keep]
+
+        sim = shared / (len(query_grams) + self.gram_counts[ids] - shared)
+        out = []
+        for wid, s in zip(ids.tolist(), sim.tolist()):
+            if edit_distance(word, self.words[wid], limit) <= limit:
+                out.append((wid, s))
+        return out
+
+    def search(self, query: str, k: int | None = None) -> list[tuple[int, float]]:
+        """Return (row, score) pairs, best first; score sums each word's best similarity."""
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return []
+
+        totals = None
+        for word in words:
+            best: dict[int, float] = {}
+            for wid, s in self.similar_words(word):
+                for row in self.word_rows[wid].tolist():
+                    if s > best.get(row, -1.0):  # a scanned short word may share no trigram
+                        best[row] = s
+            if totals is None:
+                totals = best
+            else:
+                totals = {row: totals[row] + s for row, s in best.items() if row in totals}
+            if not totals:
+                return []
+
+        ranked = sorted(totals.items())  # file order breaks score ties
+        if k is None:
+            return sorted(ranked, key=lambda rs: -rs[1])
+        return heapq.nlargest(k, ranked, key=lambda rs: rs[1])
+
+
+# ---------------------------
+# Shared, per dataset version
+# ---------------------------
+def _build(dataset: Dataset) -> TrigramIndex:
+    df = dataset.df
+    return TrigramIndex(df["TEXT"] if "TEXT" in df.columns else [])
+
+
+def get_trigram_index(dataset: Dataset) -> TrigramIndex:
+    """Build (once per dataset version) and return the fuzzy-search index."""
+    return derived(dataset, "trigram", _build)
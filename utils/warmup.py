@@ -0,0 +1,111 @@
+"""Boot-time warm-up: load datasets, build search indexes and prime image caches.
+
+`start_background_warmup()` is called from HOME.py and runs once per process
+on a daemon thread, so the first student to open a TCE page hits the same
+warm caches as everyone after them. It can also be run by hand:
+
+    python -m utils.warmup
+"""
+import os
+import sys
+import threading
+import time
+
+from utils.bm25 import get_bm25_index
+from utils.columnar import build_columnar
+from utils.datasets import DATASETS, ROOT, forget_dataset, load_dataset
+from utils.image_manifest import load_manifest
+from utils.image_variants import ensure_variant, local_variant
+from utils.keyword_index import get_keyword_index
+from utils.search import SUBJECTS
+from utils.trigram import get_trigram_index
+
+_status = {"state": "idle", "steps": [], "started": None, "elapsed": None, "errors": []}
+_thread: threading.Thread | None = None
+_lock = threading.Lock()
+
+
+def _steps():
+    # Refresh stale .arrow copies first so the loads below can memory-map them
+    yield "columnar copies", _refresh_columnar
+    for name in DATASETS:
+        yield f"load {name}", lambda name=name: load_dataset(name)
+    for name in SUBJECTS:
+        yield f"index {name}", lambda name=name: (
+            get_keyword_index(load_dataset(name)),
+            get_bm25_index(load_dataset(name)),
+            get_trigram_index(load_dataset(name)),
+        )
+    yield "image manifest", load_manifest
+    yield "image derivatives", _prime_images
+
+
+def _refresh_columnar():
+    for name, _path, rebuilt in build_columnar():
+        if rebuilt:
+            # The frame cached while building came from the CSV; reload it from the new file
+            forget_dataset(name)
+
+
+def _prime_images():
+    # Encodes missing derivatives; thumbnails also go into the memory tier
+    for entry in load_manifest().get("subjects", {}).values():
+        for image in entry["images"].values():
+            path = os.path.join(ROOT, image["path"])
+            if os.path.isfile(path):
+                ensure_variant(path, image["sha1"], "screen")
+                local_variant(path, image["sha1"], "thumb")
+
+
+def warm_up(progress=None) -> dict:
+    """Run every warm-up step in order; returns {step: seconds}.
+
+    A failing step is logged and skipped: it only costs latency, since pages
+    still load that data lazily, so the steps after it keep running.
+    """
+    timings = {}
+    for label, step in _steps():
+        t0 = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            print(f"warm-up: {label} failed: {e!r}", file=sys.stderr)
+            _status["errors"].append((label, repr(e)))
+        timings[label] = time.perf_counter() - t0
+        _status["steps"].append((label, timings[label]))
+        if progress:
+            progress(label, timings[label])
+    return timings
+
+
+def _run():
+    _status.update(state="running", started=time.time())
+    t0 = time.perf_counter()
+    warm_up()
+    _status["state"] = "done"
+    _status["elapsed"] = time.perf_counter() - t0
+
+
+def start_background_warmup() -> dict:
+    """Start the warm-up thread once per process and return its status."""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name="app4u-warmup", daemon=True)
+            _thread.start()
+    return warmup_status()
+
+
+def warmup_status() -> dict:
+    return {**_status, "steps": list(_status["steps"]), "errors": list(_status["errors"])}
+
+
+def main() -> int:
+    t0 = time.perf_counter()
+    warm_up(progress=lambda label, secs: print(f"{label:<24} {secs * 1000:8.1f} ms"))
+    print(f"{'total':<24} {(time.perf_counter() - t0) * 1000:8.1f} ms")
+    return 1 if _status["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())